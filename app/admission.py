@@ -0,0 +1,144 @@
+"""
+Admission control and load shedding for chain invocations.
+
+``AdmissionController`` caps concurrent invocations, queues a bounded number
+of waiters by priority class (cheap ``graph_only`` work ahead of full hybrid),
+and sheds the rest immediately with a Retry-After hint. An overload then
+costs some users a fast 429 instead of timing out every request together.
+
+Cache hits never reach the controller; they are always served.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+PRIORITY_CHEAP = 0  # graph_only
+PRIORITY_FULL = 1   # hybrid
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; ``retry_after`` is in whole seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server overloaded ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ("priority", "seq", "future")
+
+    def __init__(self, priority: int, seq: int, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.future = future
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AdmissionController:
+    """Bounded-concurrency gate with a bounded, prioritised wait queue.
+
+    Waiting happens on the event loop, so a queued request holds no worker
+    thread. ``acquire`` and ``release`` must be called from the loop thread;
+    other threads hand releases over with ``loop.call_soon_threadsafe``.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 32, max_queue_wait: float = 2.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self._queue: list = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._admitted = 0
+        self._shed: Dict[str, int] = {}
+        # Moving average of how long an admitted request holds its slot
+        self._service_time = 1.0
+
+    def _retry_after(self) -> int:
+        backlog = (len(self._queue) + 1) / max(self.max_concurrency, 1)
+        return max(1, math.ceil(backlog * self._service_time))
+
+    def _shed_one(self, reason: str) -> Overloaded:
+        self._shed[reason] = self._shed.get(reason, 0) + 1
+        return Overloaded(reason, self._retry_after())
+
+    def _admit(self) -> None:
+        self._in_flight += 1
+        self._admitted += 1
+
+    def _remove(self, ticket: _Ticket) -> None:
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+
+    def _wake(self) -> None:
+        # Hand free slots to the best waiters
+        while self._queue and self._in_flight < self.max_concurrency:
+            ticket = heapq.heappop(self._queue)
+            if not ticket.future.done():
+                self._admit()
+                ticket.future.set_result(None)
+
+    async def acquire(self, priority: int = PRIORITY_FULL, timeout: Optional[float] = None) -> None:
+        """Take a slot, waiting at most ``max_queue_wait`` (or ``timeout`` if shorter)."""
+        if self._in_flight < self.max_concurrency and not self._queue:
+            self._admit()
+            return
+
+        if len(self._queue) >= self.max_queue:
+            # A cheaper request displaces the most expensive, newest waiter
+            worst = max(self._queue) if self._queue else None
+            if worst is None or priority >= worst.priority:
+                raise self._shed_one("queue_full")
+            self._remove(worst)
+            worst.future.set_exception(self._shed_one("displaced"))
+
+        ticket = _Ticket(priority, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, ticket)
+        wait = self.max_queue_wait if timeout is None else max(0.0, min(self.max_queue_wait, timeout))
+        try:
+            await asyncio.wait({ticket.future}, timeout=wait)
+        except asyncio.CancelledError:
+            if ticket.future.done() and ticket.future.exception() is None:
+                self.release(0.0)
+            elif ticket in self._queue:
+                self._remove(ticket)
+            raise
+        if not ticket.future.done():
+            self._remove(ticket)
+            ticket.future.cancel()
+            raise self._shed_one("queue_timeout")
+        ticket.future.result()  # raises Overloaded when displaced
+
+    def release(self, held_for: float) -> None:
+        self._in_flight -= 1
+        self._service_time = 0.8 * self._service_time + 0.2 * held_for
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_FULL, timeout: Optional[float] = None):
+        """Hold one concurrency slot for the duration of the block."""
+        await self.acquire(priority, timeout)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._queue),
+            "admitted": self._admitted,
+            "shed": dict(self._shed),
+            "shed_total": sum(self._shed.values()),
+            "avg_service_s": round(self._service_time, 3),
+        }
@@ -0,0 +1,324 @@
+"""
+Pluggable storage for the answer cache and runtime settings.
+
+The backends share one interface, so ``main.py`` can keep the same state per
+process (``memory``), per host (``sqlite``, WAL mode, safe for concurrent
+workers) or per fleet (``kv``, any Redis-compatible client). Shared backends
+let every uvicorn worker see the same answers and default mode.
+
+Values must be JSON-serialisable.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import CacheConfig
+
+
+class CacheBackend:
+    """Minimal key/value interface shared by all cache backends."""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def items(self) -> List[Tuple[str, Any]]:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU cache."""
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._data: Dict[str, Any] = {}
+        self._order: list[str] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._data:
+                self._order.remove(key)
+                self._order.append(key)
+                return self._data[key]
+            return None
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            if key in self._data:
+                self._order.remove(key)
+            elif len(self._order) >= self.max_size:
+                oldest = self._order.pop(0)
+                self._data.pop(oldest, None)
+            self._data[key] = value
+            self._order.append(key)
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._data:
+                self._order.remove(key)
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._order.clear()
+
+    def items(self):
+        with self._lock:
+            return [(key, self._data[key]) for key in self._order]
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Host-wide, approximately LRU cache in a SQLite database running in WAL mode.
+
+    WAL lets every worker on the host read concurrently while one writes, so
+    all workers see each other's answers and settings. A hit only rewrites
+    its ``accessed`` time once it is ``touch_interval`` seconds old, so hits
+    don't queue on the database's single write lock.
+    """
+
+    def __init__(self, path: str, namespace: str, max_size: int = 64, touch_interval: float = 60.0):
+        self.path = path
+        self.namespace = namespace
+        self.max_size = max_size
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Connections are opened lazily, per thread and per process: sqlite3
+        # connections must not be shared across threads or inherited by a fork
+        if self._pid != os.getpid():
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._create_table(conn)
+            self._local.conn = conn
+        return conn
+
+    def _create_table(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_entries_lru ON cache_entries (namespace, accessed)"
+        )
+
+    def get(self, key: str):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, accessed FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] >= self.touch_interval:
+            conn.execute(
+                "UPDATE cache_entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        conn = self._conn()
+        conn.execute(
+            """
+            INSERT INTO cache_entries (namespace, key, value, accessed) VALUES (?, ?, ?, ?)
+            ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, accessed = excluded.accessed
+            """,
+            (self.namespace, key, json.dumps(value), time.time()),
+        )
+        conn.execute(
+            """
+            DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                SELECT key FROM cache_entries WHERE namespace = ?
+                ORDER BY accessed DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.namespace, self.namespace, self.max_size),
+        )
+
+    def delete(self, key: str):
+        self._conn().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        )
+
+    def clear(self):
+        self._conn().execute(
+            "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        )
+
+    def items(self):
+        rows = self._conn().execute(
+            "SELECT key, value FROM cache_entries WHERE namespace = ? ORDER BY accessed ASC",
+            (self.namespace,),
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+
+class LocalKeyValueStore:
+    """In-process stand-in for a Redis-compatible client.
+
+    Implements the subset of the redis-py API used by ``KeyValueCacheBackend``
+    (``get``, ``set`` with ``ex``, ``delete``, ``scan_iter``), so tests and
+    single-node setups can exercise the network backend without a server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._data.pop(key, None)
+                return None
+            return value
+
+    def set(self, key: str, value, ex: Optional[int] = None):
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        with self._lock:
+            self._data[key] = (value, time.time() + ex if ex else None)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def scan_iter(self, match: str = "*"):
+        prefix = match[:-1] if match.endswith("*") else match
+        with self._lock:
+            keys = [key for key in self._data if key.startswith(prefix)]
+        for key in keys:
+            yield key
+
+
+class KeyValueCacheBackend(CacheBackend):
+    """Fleet-wide cache on a Redis-compatible key/value server.
+
+    Entries are stored under ``<prefix>:<namespace>:<key>``. ``max_size`` does
+    not apply: entries expire after ``ttl`` seconds and the server's
+    maxmemory policy bounds the total.
+    """
+
+    def __init__(self, client, namespace: str, prefix: str = "educonnect", ttl: Optional[int] = None):
+        self.client = client
+        self.ttl = ttl
+        self._prefix = f"{prefix}:{namespace}:"
+
+    def get(self, key: str):
+        raw = self.client.get(self._prefix + key)
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any):
+        self.client.set(self._prefix + key, json.dumps(value), ex=self.ttl)
+
+    def delete(self, key: str):
+        self.client.delete(self._prefix + key)
+
+    def _keys(self) -> List[str]:
+        keys = []
+        for key in self.client.scan_iter(match=self._prefix + "*"):
+            keys.append(key.decode("utf-8") if isinstance(key, bytes) else key)
+        return keys
+
+    def clear(self):
+        keys = self._keys()
+        if keys:
+            self.client.delete(*keys)
+
+    def items(self):
+        entries = []
+        for full_key in self._keys():
+            value = self.get(full_key[len(self._prefix):])
+            if value is not None:
+                entries.append((full_key[len(self._prefix):], value))
+        return entries
+
+
+_kv_client = None
+_kv_lock = threading.Lock()
+
+
+def _get_kv_client():
+    global _kv_client
+    if _kv_client is not None:
+        return _kv_client
+    with _kv_lock:
+        if _kv_client is None:
+            url = CacheConfig.KV_URL
+            if not url or url.startswith("local://"):
+                _kv_client = LocalKeyValueStore()
+            else:
+                try:
+                    import redis
+                except ImportError as e:
+                    raise ImportError(
+                        "CACHE_BACKEND=kv requires the 'redis' package (pip install redis)"
+                    ) from e
+                _kv_client = redis.Redis.from_url(url)
+    return _kv_client
+
+
+# create_cache_backend default: expire kv entries after CACHE_KV_TTL
+_CONFIG_TTL = object()
+
+
+def create_cache_backend(namespace: str, max_size: int = 128, ttl=_CONFIG_TTL) -> CacheBackend:
+    """Build the backend selected by ``CACHE_BACKEND`` for one namespace.
+
+    ``ttl`` (seconds, ``None`` = never) only applies to the ``kv`` backend and
+    defaults to ``CACHE_KV_TTL``.
+    """
+    backend = CacheConfig.BACKEND
+    if backend == "memory":
+        return MemoryCacheBackend(max_size=max_size)
+    if backend == "sqlite":
+        return SQLiteCacheBackend(
+            CacheConfig.SQLITE_PATH,
+            namespace,
+            max_size=max_size,
+            touch_interval=CacheConfig.SQLITE_TOUCH_INTERVAL_S,
+        )
+    if backend == "kv":
+        return KeyValueCacheBackend(
+            _get_kv_client(), namespace, ttl=CacheConfig.KV_TTL if ttl is _CONFIG_TTL else ttl
+        )
+    raise ValueError(f"Unknown CACHE_BACKEND '{backend}' (expected memory, sqlite or kv)")
@@ -0,0 +1,84 @@
+"""
+Disk snapshots of the answer cache.
+
+``main.py`` restores a snapshot at startup, rewrites it periodically with
+``SnapshotWriter`` and once more on shutdown, so a restarted worker answers
+recent questions from cache instead of paying full LLM latency again.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from cache_backend import CacheBackend
+
+SNAPSHOT_VERSION = 1
+
+
+def _read_entries(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[SNAPSHOT] Ignoring unreadable snapshot {path}: {e}")
+        return []
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        return []
+    return [entry for entry in data.get("entries", []) if isinstance(entry, list) and len(entry) == 2]
+
+
+def load_snapshot(backend: CacheBackend, path: str) -> int:
+    """Restore entries from ``path`` into ``backend``; returns how many were loaded."""
+    entries = _read_entries(path)
+    for key, value in entries:
+        backend.set(key, value)
+    return len(entries)
+
+
+def save_snapshot(backend: CacheBackend, path: str, max_entries: Optional[int] = None) -> int:
+    """Write ``backend`` to ``path`` atomically; returns how many entries were written.
+
+    Entries already in the file are kept (ours win on conflict) so several
+    workers sharing one snapshot file accumulate rather than overwrite each
+    other. Oldest entries are dropped beyond ``max_entries``.
+    """
+    merged = {key: value for key, value in _read_entries(path)}
+    for key, value in backend.items():
+        merged.pop(key, None)
+        merged[key] = value  # re-insert so our entries count as most recent
+    entries = [[key, value] for key, value in merged.items()]
+    if max_entries is not None:
+        entries = entries[-max_entries:]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": SNAPSHOT_VERSION, "saved_at": time.time(), "entries": entries}, f)
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+class SnapshotWriter(threading.Thread):
+    """Background thread that snapshots a cache every ``interval`` seconds."""
+
+    def __init__(self, backend: CacheBackend, path: str, interval: float, max_entries: Optional[int] = None):
+        super().__init__(name="cache-snapshot", daemon=True)
+        self.backend = backend
+        self.path = path
+        self.interval = interval
+        self.max_entries = max_entries
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                save_snapshot(self.backend, self.path, self.max_entries)
+            except Exception as e:
+                print(f"[SNAPSHOT] Periodic snapshot failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,76 @@
+"""
+Compact embedding formats for the University vector index.
+
+Two levers shrink what ``create_vector_store`` keeps per node:
+
+- dimension truncation: ``CompactEmbeddings`` keeps the first ``dimensions``
+  components and re-normalises, for documents and queries alike;
+- int8 quantization of the vector index (``vector.quantization.enabled``,
+  Neo4j 5.23+).
+
+Neo4j stores the ``embedding`` property as float32 whatever the index does,
+and a quantized index keeps its float32 copy on disk for rescoring, so
+quantization shrinks the index's in-memory search vectors, not the store.
+``property_bytes`` and ``index_memory_bytes`` give both per vector.
+"""
+
+import math
+import struct
+from typing import List, Optional
+
+# Neo4j vector properties (and an unquantized index) hold float32 components
+FLOAT32_BYTES = 4
+# Lucene's int8 scalar quantization keeps one float correction per vector
+QUANTIZED_OVERHEAD_BYTES = 4
+
+
+def property_bytes(dimensions: int) -> int:
+    """Bytes of one stored ``embedding`` property."""
+    return dimensions * FLOAT32_BYTES
+
+
+def index_memory_bytes(dimensions: int, quantized: bool) -> int:
+    """Bytes per vector the index searches in memory (HNSW links not included)."""
+    if quantized:
+        return dimensions + QUANTIZED_OVERHEAD_BYTES
+    return dimensions * FLOAT32_BYTES
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+def truncate(vector: List[float], dimensions: Optional[int]) -> List[float]:
+    if not dimensions or dimensions >= len(vector):
+        return list(vector)
+    return _normalize(vector[:dimensions])
+
+
+def quantize(vector: List[float], precision: str) -> List[float]:
+    """Round-trip ``vector`` through ``precision`` (float32 or int8) and return the values it would keep.
+
+    int8 uses per-vector max-abs scaling, an approximation of the index's own
+    quantization.
+    """
+    if precision == "float32":
+        return [struct.unpack("f", struct.pack("f", x))[0] for x in vector]
+    if precision == "int8":
+        scale = max((abs(x) for x in vector), default=0.0) / 127 or 1.0
+        return [round(x / scale) * scale for x in vector]
+    raise ValueError(f"Unknown precision '{precision}' (expected float32 or int8)")
+
+
+class CompactEmbeddings:
+    """Wraps an embeddings object and truncates every vector to ``dimensions``."""
+
+    def __init__(self, base, dimensions: Optional[int] = None):
+        self.base = base
+        self.dimensions = dimensions
+
+    def embed_query(self, text):
+        return truncate(self.base.embed_query(text), self.dimensions)
+
+    def embed_documents(self, docs):
+        return [truncate(vector, self.dimensions) for vector in self.base.embed_documents(docs)]
+
@@ -13,6 +13,9 @@ DATA_LOCATION = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'd
 
 # print(f"Data location set to: {DATA_LOCATION}")
 
+# Local state (cache databases, snapshots) lives here, relative to project root
+CACHE_DIR = os.getenv("CACHE_DIR") or os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache'))
+
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
@@ -39,6 +42,112 @@ class GeminiConfig:
         self.MAX_TOKENS = max_tokens
 
 
+# class for chat serving config
+
+class ChatConfig:
+    # Upper bound on parallel HybridRAGChain invocations for one /chat/batch call
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+    # Per-request latency budget when the request sets none (0 = unbounded)
+    DEFAULT_DEADLINE_MS = int(os.getenv("DEFAULT_DEADLINE_MS", "0"))
+    # Append a JSONL record of every /chat request here (empty = disabled)
+    QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "")
+    # Startup warm-up: hot questions (JSON list or one per line) answered before /ready
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_QUESTIONS_FILE = os.getenv("WARMUP_QUESTIONS_FILE", "")
+    WARMUP_NEO4J_CONNECTIONS = int(os.getenv("WARMUP_NEO4J_CONNECTIONS", "4"))
+
+
+# class for answer cache / runtime settings storage
+
+class CacheConfig:
+    # memory: per process, sqlite: shared by all workers on a host, kv: shared by the fleet
+    BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "128"))
+    # Last full answers kept for deadline fallbacks (separate from the answer cache)
+    STALE_CACHE_SIZE = int(os.getenv("STALE_CACHE_SIZE", os.getenv("ANSWER_CACHE_SIZE", "128")))
+    SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH") or os.path.join(CACHE_DIR, "cache.sqlite3")
+    # A SQLite hit refreshes its LRU position at most this often (seconds)
+    SQLITE_TOUCH_INTERVAL_S = float(os.getenv("CACHE_SQLITE_TOUCH_INTERVAL", "60"))
+    # redis://host:6379/0, or local:// for the in-process stand-in
+    KV_URL = os.getenv("CACHE_KV_URL", "")
+    # Expiry (seconds) for kv cache entries; old-epoch keys are never read again (0 = none)
+    KV_TTL = int(os.getenv("CACHE_KV_TTL", "86400")) or None
+    # Cypher result cache, keyed by graph epoch like the answer cache
+    CYPHER_CACHE_SIZE = int(os.getenv("CYPHER_CACHE_SIZE", "512"))
+    EPOCH_POLL_INTERVAL_S = float(os.getenv("GRAPH_EPOCH_POLL_INTERVAL", "5"))
+    # Graph schema snapshot, reused until the graph epoch changes
+    SCHEMA_SNAPSHOT_PATH = os.getenv("SCHEMA_SNAPSHOT_PATH") or os.path.join(CACHE_DIR, "schema_snapshot.json")
+    # Disk snapshots; "auto" snapshots only the per-process memory backend
+    _SNAPSHOT = os.getenv("CACHE_SNAPSHOT", "auto").lower()
+    SNAPSHOT_ENABLED = BACKEND == "memory" if _SNAPSHOT == "auto" else _SNAPSHOT == "true"
+    SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH") or os.path.join(CACHE_DIR, "answers_snapshot.json")
+    SNAPSHOT_INTERVAL_S = float(os.getenv("CACHE_SNAPSHOT_INTERVAL", "300"))
+
+
+# class for the generated-Cypher cost guard
+
+class CypherGuardConfig:
+    ENABLED = os.getenv("CYPHER_GUARD_ENABLED", "true").lower() == "true"
+    TIMEOUT_S = float(os.getenv("CYPHER_GUARD_TIMEOUT", "5"))
+    MAX_HOPS = int(os.getenv("CYPHER_GUARD_MAX_HOPS", "3"))
+    MAX_ESTIMATED_ROWS = float(os.getenv("CYPHER_GUARD_MAX_ESTIMATED_ROWS", "100000"))
+    CARTESIAN_MAX_ROWS = float(os.getenv("CYPHER_GUARD_CARTESIAN_MAX_ROWS", "1000"))
+
+
+# class for Cypher-generation prompt pruning
+
+class CypherPromptConfig:
+    SELECTOR_ENABLED = os.getenv("CYPHER_SCHEMA_SELECTOR", "true").lower() == "true"
+    MAX_LABELS = int(os.getenv("CYPHER_SCHEMA_MAX_LABELS", "5"))
+    MAX_EXAMPLES = int(os.getenv("CYPHER_MAX_EXAMPLES", "3"))
+
+
+# class for /chat admission control (limits apply per worker process)
+
+class AdmissionConfig:
+    ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "8"))
+    MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+    MAX_QUEUE_WAIT_S = float(os.getenv("ADMISSION_MAX_QUEUE_WAIT", "2"))
+
+
+# class for the sentence-transformers embedding model
+
+class EmbeddingConfig:
+    MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+    # local: load per process, preload: load before fork (gunicorn --preload),
+    # socket: call the shared embedding_server.py sidecar
+    MODE = os.getenv("EMBEDDING_MODE", "local").lower()
+    SOCKET_PATH = os.getenv("EMBEDDING_SOCKET", "/tmp/educonnect-embed.sock")
+    BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+    MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+
+
+# class for LLM-based graph extraction (GraphService.populate_with_llm)
+
+class LLMGraphConfig:
+    WORKERS = int(os.getenv("LLM_GRAPH_WORKERS", "4"))
+    RATE_PER_S = float(os.getenv("LLM_GRAPH_RATE", "2"))  # LLM calls per second, 0 = unlimited
+    BATCH_SIZE = int(os.getenv("LLM_GRAPH_BATCH_SIZE", "20"))
+    # Per-document extraction cache and resume checkpoint
+    WORK_DIR = os.getenv("LLM_GRAPH_WORK_DIR") or os.path.join(CACHE_DIR, "llm_extraction")
 
 
+# class for the University vector index storage format
 
+class VectorStoreConfig:
+    # Keep only the first N embedding dimensions (0 = full 384)
+    DIMENSIONS = int(os.getenv("VECTOR_DIMENSIONS", "0"))
+    # int8-quantize the vector index (Neo4j 5.23+); false also turns off 5.23+'s default
+    INDEX_QUANTIZATION = os.getenv("VECTOR_INDEX_QUANTIZATION", "false").lower() == "true"
+
+
+# class for background re-ingestion (/admin/reingest)
+
+class ReingestConfig:
+    # Rebuild this worker's chain when another worker or process bumps the graph epoch
+    RELOAD_ON_EPOCH_CHANGE = os.getenv("RELOAD_ON_EPOCH_CHANGE", "true").lower() == "true"
+    RELOAD_CHECK_INTERVAL_S = float(os.getenv("RELOAD_CHECK_INTERVAL", "10"))
+    # Upper bound on the wait after failed reloads (doubles per failure from RELOAD_CHECK_INTERVAL)
+    RELOAD_MAX_BACKOFF_S = float(os.getenv("RELOAD_MAX_BACKOFF", "300"))
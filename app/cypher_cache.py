@@ -0,0 +1,129 @@
+"""
+Graph version tracking and a result cache for generated Cypher.
+
+Many phrasings of a question produce the same Cypher. ``CachedCypherGraph``
+sits between ``GraphCypherQAChain`` and ``Neo4jGraph`` and memoises result
+rows by Cypher text + params.
+
+All caches key their entries by the graph *epoch*: a counter stored on a
+``GraphMeta`` node that ingestion bumps. Old entries are never read again
+once the epoch moves on and simply age out of the LRU.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_neo4j.graphs.graph_store import GraphStore
+
+from cache_backend import CacheBackend
+
+GRAPH_META_LABEL = "GraphMeta"
+
+
+class GraphEpoch:
+    """Reads (and bumps) the graph epoch, polling Neo4j at most every ``poll_interval`` seconds."""
+
+    def __init__(self, graph, poll_interval: float = 5.0):
+        self.graph = graph
+        self.poll_interval = poll_interval
+        self._value: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if self._value is not None and now - self._checked_at < self.poll_interval:
+            return self._value
+        with self._lock:
+            if self._value is None or now - self._checked_at >= self.poll_interval:
+                try:
+                    rows = self.graph.query(
+                        f"OPTIONAL MATCH (m:{GRAPH_META_LABEL} {{name: 'graph'}}) "
+                        "RETURN coalesce(m.epoch, 0) AS epoch"
+                    )
+                    self._value = int(rows[0]["epoch"]) if rows else 0
+                except Exception as e:
+                    # Keep serving with the last known epoch if Neo4j is unreachable
+                    print(f"Warning: Could not read graph epoch: {e}")
+                    if self._value is None:
+                        self._value = 0
+                self._checked_at = now
+            return self._value
+
+    def bump(self) -> int:
+        """Advance the epoch after the graph data has changed."""
+        rows = self.graph.query(
+            f"MERGE (m:{GRAPH_META_LABEL} {{name: 'graph'}}) "
+            "SET m.epoch = coalesce(m.epoch, 0) + 1, m.updated_at = timestamp() "
+            "RETURN m.epoch AS epoch"
+        )
+        with self._lock:
+            self._value = int(rows[0]["epoch"])
+            self._checked_at = time.monotonic()
+        print(f"Graph epoch is now {self._value}")
+        return self._value
+
+
+class CachedCypherGraph(GraphStore):
+    """``GraphStore`` proxy that caches ``query`` results per graph epoch.
+
+    Everything else (schema, writes through ``add_graph_documents``) is passed
+    straight to the wrapped graph. Cache misses go through ``guard`` (a
+    ``CypherGuard``) when one is given.
+    """
+
+    def __init__(self, graph, epoch: GraphEpoch, cache: CacheBackend, guard=None):
+        self.graph = graph
+        self.epoch = epoch
+        self.cache = cache
+        self.guard = guard
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def get_schema(self) -> str:
+        return self.graph.get_schema
+
+    @property
+    def get_structured_schema(self) -> Dict[str, Any]:
+        return self.graph.get_structured_schema
+
+    @property
+    def _enhanced_schema(self) -> bool:
+        # Read by GraphCypherQAChain.from_llm when it formats the schema
+        return getattr(self.graph, "_enhanced_schema", False)
+
+    def refresh_schema(self) -> None:
+        self.graph.refresh_schema()
+
+    def add_graph_documents(self, graph_documents, include_source: bool = False) -> None:
+        self.graph.add_graph_documents(graph_documents, include_source)
+
+    def _key(self, query: str, params: dict) -> str:
+        raw = json.dumps([self.epoch.current(), query.strip(), params], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _execute(self, query: str, params: dict) -> List[Dict[str, Any]]:
+        if self.guard is not None:
+            return self.guard.run(query, params)
+        return self.graph.query(query, params)
+
+    def query(self, query: str, params: dict = {}) -> List[Dict[str, Any]]:
+        key = self._key(query, params)
+        rows = self.cache.get(key)
+        if rows is not None:
+            self.hits += 1
+            return rows
+        self.misses += 1
+        rows = self._execute(query, params)
+        try:
+            self.cache.set(key, rows)
+        except (TypeError, ValueError):
+            pass  # rows with non-JSON values (e.g. temporal types) are not cached
+        return rows
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "epoch": self.epoch.current()}
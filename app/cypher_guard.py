@@ -0,0 +1,176 @@
+"""
+Cost guard for LLM-generated Cypher.
+
+``GraphCypherQAChain`` executes whatever Cypher the LLM writes, and ``top_k``
+only trims rows after Neo4j has done the work. A single generated cartesian
+product or unbounded path pattern can pin the database and drag down every
+other request. ``CypherGuard`` runs before execution:
+
+1. static checks: write clauses and admin procedures are rejected, unbounded
+   variable-length patterns are bounded to ``max_hops`` and a ``LIMIT`` is
+   appended when the final ``RETURN`` has none;
+2. ``EXPLAIN``: plans containing large cartesian products or estimating
+   more than ``max_estimated_rows`` rows are rejected;
+3. accepted queries run in a read-only transaction under ``timeout`` seconds.
+"""
+
+import re
+import threading
+from typing import Any, Callable, Dict, List
+
+from neo4j import READ_ACCESS, unit_of_work
+from neo4j.exceptions import Neo4jError
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_WRITE_CLAUSE = re.compile(r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|FOREACH|LOAD\s+CSV)\b", re.IGNORECASE)
+_ADMIN_CALL = re.compile(r"\bCALL\s+(apoc|dbms|gds|db\.create)\b", re.IGNORECASE)
+# Relationship length inside a pattern, e.g. [*], [:R*2..], [r*..9]
+_VAR_LENGTH = re.compile(r"\*(?:\s*(\d+))?(?:\s*(\.\.))?(?:\s*(\d+))?(?=\s*[\]{])")
+_LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+_RETURN = re.compile(r"\bRETURN\b", re.IGNORECASE)
+_UNION = re.compile(r"\bUNION\b", re.IGNORECASE)
+
+
+class CypherRejected(ValueError):
+    """Raised when a generated query is refused by the guard."""
+
+    def __init__(self, reason: str, query: str):
+        super().__init__(f"{reason}: {query}")
+        self.reason = reason
+        self.query = query
+
+
+def _normalize(query: str) -> str:
+    return query.strip().rstrip(";").strip()
+
+
+def _outside_strings(query: str, fn: Callable[[str], str]) -> str:
+    """Apply ``fn`` to every part of ``query`` that is not a string literal."""
+    parts, last = [], 0
+    for match in _STRING_LITERAL.finditer(query):
+        parts.append(fn(query[last:match.start()]))
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(fn(query[last:]))
+    return "".join(parts)
+
+
+def _walk_plan(plan: Dict[str, Any]):
+    yield plan
+    for child in plan.get("children", []) or []:
+        yield from _walk_plan(child)
+
+
+def _estimated_rows(operator: Dict[str, Any]) -> float:
+    args = operator.get("args") or operator.get("arguments") or {}
+    try:
+        return float(args.get("EstimatedRows", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class CypherGuard:
+    """Checks, rewrites and executes generated Cypher against a ``Neo4jGraph``."""
+
+    def __init__(
+        self,
+        graph,
+        timeout: float = 5.0,
+        default_limit: int = 10,
+        max_hops: int = 3,
+        max_estimated_rows: float = 100000,
+        cartesian_max_rows: float = 1000,
+    ):
+        self.graph = graph
+        self.timeout = timeout
+        self.default_limit = default_limit
+        self.max_hops = max_hops
+        self.max_estimated_rows = max_estimated_rows
+        # Cartesian products of tiny label sets (e.g. Tier x FeeRange) are harmless
+        self.cartesian_max_rows = cartesian_max_rows
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"checked": 0, "rewritten": 0, "executed": 0, "timeouts": 0, "rejected": {}}
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            self._stats[field] += 1
+
+    def _reject(self, reason: str, query: str) -> CypherRejected:
+        with self._lock:
+            self._stats["rejected"][reason] = self._stats["rejected"].get(reason, 0) + 1
+        return CypherRejected(reason, query)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["rejected"] = dict(self._stats["rejected"])
+        stats["rejected_total"] = sum(stats["rejected"].values())
+        return stats
+
+    def _bound_var_length(self, match: re.Match) -> str:
+        low, dots, high = match.group(1), match.group(2), match.group(3)
+        if dots is None:
+            # "*" alone is unbounded; "*3" is a fixed length
+            return match.group(0) if low else f"*1..{self.max_hops}"
+        low_hops = int(low) if low else 1
+        if low_hops > self.max_hops:
+            raise self._reject("path_too_long", match.string)
+        high_hops = min(int(high), self.max_hops) if high else self.max_hops
+        return f"*{low_hops}..{high_hops}"
+
+    def rewrite(self, query: str) -> str:
+        """Static checks and rewrites; raises ``CypherRejected``."""
+        query = _normalize(query)
+        stripped = _STRING_LITERAL.sub("''", query)
+        if _WRITE_CLAUSE.search(stripped):
+            raise self._reject("write_clause", query)
+        if _ADMIN_CALL.search(stripped):
+            raise self._reject("procedure_call", query)
+
+        rewritten = _outside_strings(query, lambda part: _VAR_LENGTH.sub(self._bound_var_length, part))
+        stripped = _STRING_LITERAL.sub("''", rewritten)
+        returns = list(_RETURN.finditer(stripped))
+        # Only a LIMIT after the final RETURN bounds the result; earlier ones
+        # (e.g. "WITH u LIMIT 5 MATCH ...") can still fan out
+        if returns and not _LIMIT.search(stripped, returns[-1].end()) and not _UNION.search(stripped):
+            rewritten = f"{rewritten}\nLIMIT {self.default_limit}"
+        return rewritten
+
+    def explain(self, query: str, params: dict) -> None:
+        """Reject queries whose plan is too expensive."""
+        with self.graph._driver.session(database=self.graph._database, default_access_mode=READ_ACCESS) as session:
+            plan = session.run(f"EXPLAIN {query}", params).consume().plan
+        if not plan:
+            return
+        for operator in _walk_plan(plan):
+            operator_type = str(operator.get("operatorType", ""))
+            if operator_type.startswith("CartesianProduct") and _estimated_rows(operator) > self.cartesian_max_rows:
+                raise self._reject("cartesian_product", query)
+        if _estimated_rows(plan) > self.max_estimated_rows:
+            raise self._reject("too_many_rows", query)
+
+    def run(self, query: str, params: dict = {}) -> List[Dict[str, Any]]:
+        """Check, rewrite and execute ``query`` read-only under the timeout."""
+        self._count("checked")
+        guarded = self.rewrite(query)
+        if guarded != _normalize(query):
+            self._count("rewritten")
+        try:
+            self.explain(guarded, params)
+        except Neo4jError as e:
+            raise self._reject("invalid_query", f"{guarded} ({e.message})")
+
+        @unit_of_work(timeout=self.timeout)
+        def _read(tx):
+            return [record.data() for record in tx.run(guarded, params)]
+
+        try:
+            with self.graph._driver.session(database=self.graph._database, default_access_mode=READ_ACCESS) as session:
+                rows = session.execute_read(_read)
+        except Neo4jError as e:
+            if e.code and "TransactionTimedOut" in e.code:
+                self._count("timeouts")
+                raise CypherRejected("timeout", guarded)
+            raise
+        self._count("executed")
+        return rows
@@ -0,0 +1,171 @@
+"""
+Graph schema snapshot and per-question schema/example selection.
+
+- ``load_schema`` reuses a schema snapshot on disk for as long as the graph
+  epoch it was taken at is current, and refreshes + rewrites it otherwise,
+  so startup skips ``Neo4jGraph``'s introspection queries;
+- ``SchemaSelector`` keeps only the labels, relationships and examples that
+  are closest to the question (embedding similarity with ``SimpleEmbeddings``).
+"""
+
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, List, Tuple
+
+SCHEMA_SNAPSHOT_VERSION = 1
+
+
+def load_schema(graph, epoch: int, path: str) -> bool:
+    """Populate ``graph.schema`` / ``graph.structured_schema`` for ``epoch``.
+
+    Returns True when the snapshot was reused, False when Neo4j was queried.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") == SCHEMA_SNAPSHOT_VERSION and snapshot.get("epoch") == epoch:
+            graph.schema = snapshot["schema"]
+            graph.structured_schema = snapshot["structured_schema"]
+            return True
+    except (OSError, ValueError, KeyError):
+        pass
+    refresh_schema(graph, epoch, path)
+    return False
+
+
+def refresh_schema(graph, epoch: int, path: str) -> None:
+    """Introspect the schema from Neo4j and snapshot it for ``epoch``."""
+    graph.refresh_schema()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": SCHEMA_SNAPSHOT_VERSION,
+                    "epoch": epoch,
+                    "schema": graph.schema,
+                    "structured_schema": graph.structured_schema,
+                },
+                f,
+                default=str,
+            )
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not write schema snapshot: {e}")
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _format_props(props: Iterable[Dict[str, Any]]) -> str:
+    return ", ".join(f"{p['property']}: {p['type']}" for p in props)
+
+
+def format_schema(structured_schema: Dict[str, Any], labels: Iterable[str], rel_types: Iterable[str], relationships: Iterable[Dict[str, str]]) -> str:
+    """Render a subset of a structured schema in ``Neo4jGraph.schema``'s layout."""
+    node_props = structured_schema.get("node_props", {})
+    rel_props = structured_schema.get("rel_props", {})
+    nodes = [f"{label} {{{_format_props(node_props.get(label, []))}}}" for label in labels]
+    rels = [f"{rel} {{{_format_props(rel_props[rel])}}}" for rel in rel_types if rel_props.get(rel)]
+    edges = [f"(:{r['start']})-[:{r['type']}]->(:{r['end']})" for r in relationships]
+    return "\n".join([
+        "Node properties:",
+        "\n".join(nodes),
+        "Relationship properties:",
+        "\n".join(rels),
+        "The relationships:",
+        "\n".join(edges),
+    ])
+
+
+def format_examples(examples: Iterable[Tuple[str, str]]) -> str:
+    return "\n".join(f'- "{question}" -> {cypher}' for question, cypher in examples)
+
+
+class SchemaSelector:
+    """Prunes the schema and few-shot examples to what a question needs.
+
+    Every label, relationship pattern and example is embedded once; per
+    question the ``max_labels`` most similar labels (plus ``always_include``)
+    and the relationships between them are kept, along with the
+    ``max_examples`` most similar examples.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        structured_schema: Dict[str, Any],
+        examples: List[Tuple[str, str]],
+        max_labels: int = 5,
+        max_examples: int = 3,
+        always_include: Iterable[str] = ("University",),
+        exclude_types: Iterable[str] = (),
+    ):
+        self.embeddings = embeddings
+        self.structured_schema = structured_schema
+        self.examples = examples
+        self.max_labels = max_labels
+        self.max_examples = max_examples
+        excluded = set(exclude_types)
+
+        node_props = structured_schema.get("node_props", {})
+        self.labels = [label for label in node_props if label not in excluded]
+        self.always_include = [label for label in always_include if label in self.labels]
+        self.relationships = [
+            r for r in structured_schema.get("relationships", [])
+            if r["start"] not in excluded and r["end"] not in excluded
+        ]
+
+        label_texts = [f"{label}: {_format_props(node_props[label])}" for label in self.labels]
+        rel_texts = [f"{r['start']} {r['type']} {r['end']}" for r in self.relationships]
+        example_texts = [question for question, _ in examples]
+        vectors = embeddings.embed_documents(label_texts + rel_texts + example_texts)
+        self._label_vectors = vectors[:len(label_texts)]
+        self._rel_vectors = vectors[len(label_texts):len(label_texts) + len(rel_texts)]
+        self._example_vectors = vectors[len(label_texts) + len(rel_texts):]
+
+    def select(self, question: str) -> Tuple[str, str]:
+        """Return (schema text, examples text) for ``question``."""
+        query_vector = self.embeddings.embed_query(question)
+
+        label_scores = {
+            label: _cosine(query_vector, vector) for label, vector in zip(self.labels, self._label_vectors)
+        }
+        rel_scores = [_cosine(query_vector, vector) for vector in self._rel_vectors]
+        # A relationship pattern that matches the question well pulls in both endpoints
+        for r, score in zip(self.relationships, rel_scores):
+            for label in (r["start"], r["end"]):
+                if label in label_scores:
+                    label_scores[label] = max(label_scores[label], score)
+
+        ranked = sorted(label_scores, key=label_scores.get, reverse=True)
+        selected = list(self.always_include)
+        for label in ranked:
+            if len(selected) >= self.max_labels + len(self.always_include):
+                break
+            if label not in selected:
+                selected.append(label)
+
+        chosen = set(selected)
+        relationships = [r for r in self.relationships if r["start"] in chosen and r["end"] in chosen]
+        rel_types = sorted({r["type"] for r in relationships})
+        schema = format_schema(self.structured_schema, selected, rel_types, relationships)
+
+        example_scores = [_cosine(query_vector, vector) for vector in self._example_vectors]
+        best = sorted(range(len(self.examples)), key=lambda i: example_scores[i], reverse=True)[:self.max_examples]
+        examples = format_examples([self.examples[i] for i in sorted(best)])
+        return schema, examples
+
+    def prompt_inputs(self, inputs: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Map the chain's ``{question, schema}`` to pruned prompt inputs.
+
+        ``GraphCypherQAChain`` invokes the generation chain with ``callbacks``,
+        which ``RunnableLambda`` passes on as a keyword argument; it is ignored.
+        """
+        schema, examples = self.select(inputs["question"])
+        return {**inputs, "schema": schema, "examples": examples}
@@ -1,12 +1,120 @@
-from sentence_transformers import SentenceTransformer
+import json
+import socket
+import threading
+
+from config import EmbeddingConfig
+
+# Process-wide model cache. Loading here before the server forks (see
+# preload_model) lets every worker share the weights copy-on-write.
+_MODELS = {}
+_models_lock = threading.Lock()
+
+
+def load_model(model_name=EmbeddingConfig.MODEL_NAME):
+    model = _MODELS.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _MODELS.get(model_name)
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(model_name)
+                _MODELS[model_name] = model
+    return model
+
+
+def preload_model(model_name=EmbeddingConfig.MODEL_NAME):
+    """Load the model in the pre-fork master (e.g. gunicorn --preload)."""
+    load_model(model_name)
+
+
+class EmbeddingClient:
+    """Talks to embedding_server.py over a Unix socket, one connection per thread.
+
+    Protocol: one JSON object per line, ``{"texts": [...]}`` -> ``{"vectors": [...]}``.
+    Requests are sent in chunks of at most ``max_batch`` texts.
+    """
+
+    def __init__(self, socket_path, timeout=30.0, max_batch=EmbeddingConfig.MAX_BATCH):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.max_batch = max_batch
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(self.timeout)
+        try:
+            conn.connect(self.socket_path)
+        except OSError:
+            conn.close()
+            raise
+        self._local.conn = conn
+        self._local.reader = conn.makefile("rb")
+        return conn
+
+    def _request(self, texts):
+        conn = getattr(self._local, "conn", None) or self._connect()
+        conn.sendall(json.dumps({"texts": texts}).encode("utf-8") + b"\n")
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Embedding server closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(f"Embedding server error: {response['error']}")
+        return response["vectors"]
+
+    def _close(self):
+        for name in ("reader", "conn"):
+            handle = getattr(self._local, name, None)
+            setattr(self._local, name, None)
+            if handle is not None:
+                try:
+                    handle.close()
+                except OSError:
+                    pass
+
+    def embed(self, texts):
+        texts = list(texts)
+        step = self.max_batch if self.max_batch and self.max_batch > 0 else len(texts) or 1
+        vectors = []
+        for start in range(0, len(texts), step):
+            vectors.extend(self._embed_chunk(texts[start:start + step]))
+        return vectors
+
+    def _embed_chunk(self, texts):
+        try:
+            return self._request(texts)
+        except socket.timeout:
+            # The sidecar may still be working on it: drop the connection, don't resend
+            self._close()
+            raise
+        except (OSError, ConnectionError, ValueError):
+            self._close()
+        # Reconnect once, e.g. after the sidecar restarted
+        try:
+            return self._request(texts)
+        except (OSError, ConnectionError, ValueError):
+            self._close()
+            raise
+
 
 class SimpleEmbeddings:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name=EmbeddingConfig.MODEL_NAME, socket_path=None):
+        socket_path = socket_path or (EmbeddingConfig.SOCKET_PATH if EmbeddingConfig.MODE == "socket" else None)
+        if socket_path:
+            # Model lives in the shared sidecar; nothing is loaded in this process
+            self.client = EmbeddingClient(socket_path)
+            self.model = None
+        else:
+            self.client = None
+            self.model = load_model(model_name)
 
     def embed_query(self, text):
+        if self.client is not None:
+            return self.client.embed([text])[0]
         return self.model.encode(text).tolist()
 
     def embed_documents(self, docs):
-        return [self.model.encode(doc).tolist() for doc in docs]
-
+        if self.client is not None:
+            return self.client.embed(list(docs))
+        return [vector.tolist() for vector in self.model.encode(list(docs))]
@@ -0,0 +1,113 @@
+"""Recall-versus-footprint report for compact embedding formats.
+
+Embeds the University catalog the way ``create_vector_store`` does, treats
+exact float32 / full-dimension cosine search as ground truth, and reports
+recall@k for every dimension x index precision combination, along with the
+bytes per vector of the stored property (always float32) and of the index's
+in-memory search vectors (int8 when quantized). Use it to pick
+``VECTOR_DIMENSIONS`` / ``VECTOR_INDEX_QUANTIZATION`` before re-indexing.
+
+Run:
+  python embedding_eval.py --dimensions 384,256,128,64 --k 5
+  python embedding_eval.py --queries questions.txt --json
+"""
+
+import argparse
+import json
+from typing import Dict, List, Optional
+
+from compact_embeddings import index_memory_bytes, property_bytes, quantize, truncate
+from config import DATA_LOCATION
+from embedding import SimpleEmbeddings
+from graph_service import _split_location, vector_text
+
+
+def node_texts(universities: List[Dict]) -> List[str]:
+    """Node text as Neo4jVector builds it from ``VECTOR_TEXT_PROPERTIES``."""
+    return [vector_text({**uni, "name": uni["university_name"]}) for uni in universities]
+
+
+def default_queries(universities: List[Dict]) -> List[str]:
+    queries, states, programs = [], set(), set()
+    for uni in universities:
+        queries.append(f"Tell me about {uni['university_name']}")
+        _, state, _ = _split_location(uni.get("location", ""))
+        if state:
+            states.add(state)
+        programs.update(uni.get("programs", []))
+    queries += [f"universities in {state}" for state in sorted(states)]
+    queries += [f"universities offering {program}" for program in sorted(programs)]
+    return queries
+
+
+def _top_k(query: List[float], docs: List[List[float]], k: int) -> List[int]:
+    scores = [sum(q * d for q, d in zip(query, doc)) for doc in docs]
+    return sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)[:k]
+
+
+def evaluate(doc_vectors: List[List[float]], query_vectors: List[List[float]], dimensions: List[Optional[int]], precisions: List[str], k: int) -> List[Dict]:
+    full_dims = len(doc_vectors[0])
+    truth = [set(_top_k(truncate(q, None), [truncate(d, None) for d in doc_vectors], k)) for q in query_vectors]
+    rows = []
+    for dims in dimensions:
+        size = min(dims or full_dims, full_dims)
+        for precision in precisions:
+            docs = [quantize(truncate(d, size), precision) for d in doc_vectors]
+            hits = sum(
+                len(truth[i] & set(_top_k(quantize(truncate(q, size), precision), docs, k)))
+                for i, q in enumerate(query_vectors)
+            )
+            quantized = precision == "int8"
+            rows.append({
+                "dimensions": size,
+                "precision": precision,
+                "property_bytes": property_bytes(size),
+                "index_memory_bytes": index_memory_bytes(size, quantized),
+                "property_ratio": round(property_bytes(size) / property_bytes(full_dims), 3),
+                "index_memory_ratio": round(index_memory_bytes(size, quantized) / index_memory_bytes(full_dims, False), 3),
+                f"recall@{k}": round(hits / (len(query_vectors) * min(k, len(doc_vectors))), 3),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs footprint of compact embedding formats")
+    parser.add_argument("--data", default=f"{DATA_LOCATION}/universities.json")
+    parser.add_argument("--queries", help="file with one query per line (defaults to queries built from the data)")
+    parser.add_argument("--dimensions", default="384,256,128,64", help="comma-separated dimension settings")
+    parser.add_argument("--precisions", default="float32,int8", help="index precisions: float32 (plain) and/or int8 (quantized)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    with open(args.data, "r") as f:
+        universities = json.load(f)
+    if isinstance(universities, dict):
+        universities = [universities]
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = default_queries(universities)
+
+    embeddings = SimpleEmbeddings()
+    doc_vectors = embeddings.embed_documents(node_texts(universities))
+    query_vectors = embeddings.embed_documents(queries)
+    dimensions = [int(d) for d in args.dimensions.split(",")]
+    rows = evaluate(doc_vectors, query_vectors, dimensions, args.precisions.split(","), args.k)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    recall = f"recall@{args.k}"
+    print(f"{len(doc_vectors)} documents, {len(queries)} queries, ground truth: float32 x {len(doc_vectors[0])}")
+    print(f"{'dims':>5} {'precision':>9} {'property':>8} {'index':>6} {'p.ratio':>7} {'i.ratio':>7} {recall:>9}")
+    for row in rows:
+        print(
+            f"{row['dimensions']:>5} {row['precision']:>9} {row['property_bytes']:>8} {row['index_memory_bytes']:>6} "
+            f"{row['property_ratio']:>7} {row['index_memory_ratio']:>7} {row[recall]:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
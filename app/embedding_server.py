@@ -0,0 +1,118 @@
+"""Local embedding sidecar.
+
+Loads the SentenceTransformer model once and serves every uvicorn worker on
+the host over a Unix socket, instead of each worker holding its own copy of
+torch and the weights. Requests arriving within ``--batch-window-ms`` of each
+other are encoded together (micro-batching), which raises throughput under
+concurrent hybrid traffic.
+
+Run:
+  python embedding_server.py --socket /tmp/educonnect-embed.sock
+and start the API with EMBEDDING_MODE=socket.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from config import EmbeddingConfig
+from embedding import load_model
+
+# asyncio's default 64 KiB line limit is smaller than one large embed_documents
+# request (Neo4jVector sends up to 1000 node texts at a time)
+STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class MicroBatcher:
+    """Collects concurrent requests and encodes them in one model call."""
+
+    def __init__(self, model, batch_window_ms: float, max_batch: int):
+        self.model = model
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.batches = 0
+        self.texts = 0
+
+    async def embed(self, texts):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            count = len(pending[0][0])
+            window_ends = time.monotonic() + self.batch_window
+            while count < self.max_batch:
+                timeout = window_ends - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                count += len(item[0])
+
+            texts = [text for item_texts, _ in pending for text in item_texts]
+            try:
+                vectors = await loop.run_in_executor(None, self.model.encode, texts)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(texts)
+
+            offset = 0
+            for item_texts, future in pending:
+                future.set_result([v.tolist() for v in vectors[offset:offset + len(item_texts)]])
+                offset += len(item_texts)
+
+
+async def _handle(batcher: MicroBatcher, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                texts = json.loads(line)["texts"]
+                response = {"vectors": await batcher.embed(texts)}
+            except Exception as e:
+                response = {"error": str(e)}
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: str, model_name: str, batch_window_ms: float, max_batch: int, model=None):
+    model = model if model is not None else load_model(model_name)
+    batcher = MicroBatcher(model, batch_window_ms, max_batch)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: _handle(batcher, reader, writer), path=socket_path, limit=STREAM_LIMIT
+    )
+    print(f"[EMBED] Serving {model_name} on {socket_path}")
+    async with server:
+        await asyncio.gather(server.serve_forever(), batcher.run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EduConnect embedding sidecar")
+    parser.add_argument("--socket", default=EmbeddingConfig.SOCKET_PATH)
+    parser.add_argument("--model", default=EmbeddingConfig.MODEL_NAME)
+    parser.add_argument("--batch-window-ms", type=float, default=EmbeddingConfig.BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=EmbeddingConfig.MAX_BATCH)
+    args = parser.parse_args()
+    asyncio.run(serve(args.socket, args.model, args.batch_window_ms, args.max_batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from config import Neo4jConfig, GeminiConfig, DATA_LOCATION
+from config import Neo4jConfig, GeminiConfig, CacheConfig, LLMGraphConfig, VectorStoreConfig, DATA_LOCATION
 from langchain_neo4j import Neo4jGraph
 from langchain_community.vectorstores import Neo4jVector
 from langchain_experimental.graph_transformers import LLMGraphTransformer
@@ -6,15 +6,81 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import PromptTemplate
 from convert_to_docs import convert_to_docs
 import json
+import os
+import re
 from embedding import SimpleEmbeddings
+from compact_embeddings import CompactEmbeddings
+from cypher_cache import GraphEpoch
+from cypher_schema import load_schema, refresh_schema
+from llm_extraction import Checkpoint, ExtractionCache, extract_to_graph
+
+DEFAULT_CURRENCY = "USD"
+
+# University properties embedded for semantic retrieval
+VECTOR_TEXT_PROPERTIES = ["name", "location", "website", "rank", "tuition_fee", "acceptance_rate"]
+VECTOR_INDEX_NAME = "university_index"
+VECTOR_PROPERTY = "embedding"
+
+# Range indexes backing the typed properties written by _populate_graph
+RANGE_INDEXES = [
+    ("university_name", "University", "name"),
+    ("university_rank", "University", "rank"),
+    ("university_tuition_fee", "University", "tuition_fee"),
+    ("university_acceptance_rate_pct", "University", "acceptance_rate_pct"),
+    ("university_city", "University", "city"),
+    ("university_state", "University", "state"),
+    ("university_country", "University", "country"),
+    ("location_state", "Location", "state"),
+    ("program_cost_ranking_program", "ProgramCostRanking", "program"),
+    ("state_summary_state", "StateSummary", "state"),
+    ("test_summary_test", "TestSummary", "test"),
+]
+
+
+def _parse_percentage(value):
+    """"7%" / "7.5 %" / 7 -> 7.0; None when the value has no number."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d+(?:\.\d+)?", str(value or ""))
+    return float(match.group(0)) if match else None
+
+
+def _parse_money(value):
+    """55000 -> 55000, "$55,000" -> 55000.0; None when the value has no number."""
+    if isinstance(value, (int, float)):
+        return value
+    match = re.search(r"\d+(?:\.\d+)?", str(value or "").replace(",", ""))
+    return float(match.group(0)) if match else None
+
+
+def _split_location(location):
+    """"Cambridge, Massachusetts, USA" -> ("Cambridge", "Massachusetts", "USA")."""
+    location_parts = [part.strip() for part in location.split(",")]
+    city = location_parts[0] if len(location_parts) > 0 else location
+    state = location_parts[1] if len(location_parts) > 1 else ""
+    country = location_parts[2] if len(location_parts) > 2 else ""
+    return city, state, country
+
+
+def vector_text(values):
+    """Text Neo4jVector embeds for a node: ``"\\nprop:value"`` per ``VECTOR_TEXT_PROPERTIES``."""
+    return "".join(f"\n{prop}:{'' if values.get(prop) is None else values[prop]}" for prop in VECTOR_TEXT_PROPERTIES)
+
 
 class GraphService:
-    def __init__(self, build_graph=False):
+    def __init__(self, build_graph=False, on_progress=None, publish=True, with_vector_store=True):
+        # on_progress(stage, done, total) is called as ingestion advances
+        self.on_progress = on_progress
         self.graph = Neo4jGraph(
             url=Neo4jConfig.URI,
             username=Neo4jConfig.USER,
-            password=Neo4jConfig.PASSWORD
+            password=Neo4jConfig.PASSWORD,
+            refresh_schema=False
         )
+        # Bumped after every ingestion; all caches key their entries by it
+        self.epoch = GraphEpoch(self.graph, poll_interval=CacheConfig.EPOCH_POLL_INTERVAL_S)
+        # Introspection queries only run when the snapshot is from an older epoch
+        load_schema(self.graph, self.epoch.current(), CacheConfig.SCHEMA_SNAPSHOT_PATH)
         geminiConfig = GeminiConfig()
 
         self.embeddings = SimpleEmbeddings()
@@ -27,67 +93,124 @@ class GraphService:
         )
 
         if build_graph:
-            self._populate_graph()
+            self._populate_graph(publish=publish)
             # self.populate_with_llm()
 
             print("Graph has been initialized and documents have been added.")
             print("Graph details and visualization can be found in the Neo4j dashboard.")
-        self.create_vector_store()
+        # with_vector_store=False: the caller builds it after its own ingestion
+        self.vector_store = None
+        if with_vector_store:
+            self.create_vector_store()
+
+    def _report(self, stage, done, total):
+        if self.on_progress is not None:
+            self.on_progress(stage, done, total)
+
+    def _vector_embeddings(self):
+        """Embeddings shaped like the stored vectors (truncated to ``VECTOR_DIMENSIONS``)."""
+        dimensions = VectorStoreConfig.DIMENSIONS or None
+        return CompactEmbeddings(self.embeddings, dimensions) if dimensions else self.embeddings
+
+    def publish(self):
+        """Bump the epoch and re-snapshot the schema so every worker drops cached answers."""
+        epoch = self.epoch.bump()
+        refresh_schema(self.graph, epoch, CacheConfig.SCHEMA_SNAPSHOT_PATH)
+        return epoch
 
     def _clear_graph(self):
         self.graph.query("MATCH (n) DETACH DELETE n")
 
 
-    def _populate_graph(self):
+    def _create_indexes(self):
+        for index_name, label, prop in RANGE_INDEXES:
+            self.graph.query(
+                f"CREATE RANGE INDEX {index_name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+            )
+
+    def _populate_graph(self, publish=True):
+     self._create_indexes()
+     embeddings = self._vector_embeddings()
      with open(f"{DATA_LOCATION}/universities.json", "r") as file:
         universities = json.load(file)
 
         if isinstance(universities, dict):
             universities = [universities]
 
-        for uni in universities:
+        # Keys whose aggregate views need recomputing after this load
+        touched_programs, touched_states = set(), set()
+
+        for done, uni in enumerate(universities):
+            self._report("graph", done, len(universities))
             name = uni["university_name"]
             location = uni.get("location", "Unknown")
             rank = uni.get("rank", 0)
-            tuition_fee = uni.get("tuition_fee", 0)
+            tuition_fee = _parse_money(uni.get("tuition_fee", 0))
+            tuition_currency = uni.get("tuition_currency", DEFAULT_CURRENCY)
             acceptance_rate = uni.get("acceptance_rate", "Unknown")
+            acceptance_rate_pct = _parse_percentage(acceptance_rate)
             website = uni.get("website", "")
+            city, state, country = _split_location(location) if location != "Unknown" else ("", "", "")
             
             programs = uni.get("programs", [])
             requirements = uni.get("requirements", {})
             
             print(f"Adding university: {name}")
+            # Both the old and the new state summary change if a university moves
+            previous = self.graph.query(
+                "MATCH (u:University {name: $name}) "
+                "RETURN u.state AS state, [p IN $props | u[p]] AS text",
+                params={"name": name, "props": VECTOR_TEXT_PROPERTIES}
+            )
+            touched_states.update(row["state"] for row in previous if row["state"])
+            text = dict(name=name, location=location, website=website, rank=rank,
+                        tuition_fee=tuition_fee, acceptance_rate=acceptance_rate)
+            # Changed text is re-embedded and written with it, so the node stays
+            # searchable; new nodes are embedded in bulk by create_vector_store
+            reembed = any(row["text"] != [text[p] for p in VECTOR_TEXT_PROPERTIES] for row in previous)
+            vector = embeddings.embed_documents([vector_text(text)])[0] if reembed else None
+            touched_programs.update(programs)
+            if state:
+                touched_states.add(state)
             
-            # Create University node with all properties
+            # Create University node with all properties; numeric and location
+            # fields are stored typed so range filters become index seeks
             university_cypher = """
             MERGE (u:University {name: $name})
             SET u.location = $location,
+                u.city = $city,
+                u.state = $state,
+                u.country = $country,
                 u.rank = $rank,
                 u.tuition_fee = $tuition_fee,
+                u.tuition_currency = $tuition_currency,
                 u.acceptance_rate = $acceptance_rate,
+                u.acceptance_rate_pct = $acceptance_rate_pct,
                 u.website = $website
-            """
+            WITH u WHERE $vector IS NOT NULL
+            CALL db.create.setNodeVectorProperty(u, '%s', $vector)
+            """ % VECTOR_PROPERTY
             
             self.graph.query(
                 university_cypher,
                 params={
                     "name": name,
                     "location": location,
+                    "city": city,
+                    "state": state,
+                    "country": country,
                     "rank": rank,
                     "tuition_fee": tuition_fee,
+                    "tuition_currency": tuition_currency,
                     "acceptance_rate": acceptance_rate,
-                    "website": website
+                    "acceptance_rate_pct": acceptance_rate_pct,
+                    "website": website,
+                    "vector": vector
                 }
             )
             
             # Create Location node and relationship
             if location != "Unknown":
-                # Extract city and state/country from location
-                location_parts = location.split(", ")
-                city = location_parts[0] if len(location_parts) > 0 else location
-                state = location_parts[1] if len(location_parts) > 1 else ""
-                country = location_parts[2] if len(location_parts) > 2 else ""
-                
                 location_cypher = """
                 MATCH (u:University {name: $name})
                 MERGE (l:Location {name: $location})
@@ -193,6 +316,18 @@ class GraphService:
         
         
         self._create_additional_relationships()
+        # Test summaries list every university without the test, so all are refreshed
+        self.refresh_aggregates(
+            programs=sorted(touched_programs),
+            states=sorted(touched_states),
+            tests=None
+        )
+        self._report("graph", len(universities), len(universities))
+        if publish:
+            self.publish()
+        else:
+            # The caller publishes later; its chain still needs the new schema
+            self.graph.refresh_schema()
     
     def _create_additional_relationships(self):
         """Create additional relationships to enrich the graph"""
@@ -271,28 +406,135 @@ class GraphService:
         
         self.graph.query("""
             MATCH (u:University)
-            WHERE toFloat(replace(u.acceptance_rate, '%', '')) < 10
+            WHERE u.acceptance_rate_pct < 10
             MERGE (a:AcceptanceCategory {category: "Highly Selective (<10%)"})
             MERGE (u)-[:HAS_ACCEPTANCE_RATE]->(a)
         """)
         
         self.graph.query("""
             MATCH (u:University)
-            WHERE toFloat(replace(u.acceptance_rate, '%', '')) >= 10 AND toFloat(replace(u.acceptance_rate, '%', '')) < 30
+            WHERE u.acceptance_rate_pct >= 10 AND u.acceptance_rate_pct < 30
             MERGE (a:AcceptanceCategory {category: "Selective (10-30%)"})
             MERGE (u)-[:HAS_ACCEPTANCE_RATE]->(a)
         """)
         
         self.graph.query("""
             MATCH (u:University)
-            WHERE toFloat(replace(u.acceptance_rate, '%', '')) >= 30
+            WHERE u.acceptance_rate_pct >= 30
             MERGE (a:AcceptanceCategory {category: "Moderately Selective (30%+)"})
             MERGE (u)-[:HAS_ACCEPTANCE_RATE]->(a)
         """)
         
         print("All additional relationships created successfully!")
+
+    def refresh_aggregates(self, programs=None, states=None, tests=None):
+        """Precompute aggregate views so ranking / cost questions are single-node lookups.
+
+        Each argument limits the refresh to the given keys; None refreshes all.
+        Views whose key no longer has any university are removed.
+        """
+        print("Refreshing aggregate views...")
+
+        # Per-program universities sorted by tuition, with tuition stats
+        self.graph.query("""
+            MATCH (p:Program)
+            WHERE $programs IS NULL OR p.name IN $programs
+            MATCH (u:University)-[:OFFERS]->(p)
+            WITH p, u ORDER BY u.tuition_fee ASC
+            WITH p,
+                 collect(u.name) AS names,
+                 collect(u.tuition_fee) AS fees,
+                 count(u) AS n,
+                 avg(u.tuition_fee) AS avg_fee,
+                 min(u.tuition_fee) AS min_fee,
+                 max(u.tuition_fee) AS max_fee
+            MERGE (r:ProgramCostRanking {program: p.name})
+            SET r.universities_by_tuition = names,
+                r.tuition_fees = fees,
+                r.university_count = n,
+                r.avg_tuition = avg_fee,
+                r.min_tuition = min_fee,
+                r.max_tuition = max_fee,
+                r.updated_at = timestamp()
+            MERGE (p)-[:HAS_COST_RANKING]->(r)
+        """, params={"programs": programs})
+
+        self.graph.query("""
+            MATCH (r:ProgramCostRanking)
+            WHERE ($programs IS NULL OR r.program IN $programs)
+              AND NOT EXISTS { MATCH (:University)-[:OFFERS]->(:Program {name: r.program}) }
+            DETACH DELETE r
+        """, params={"programs": programs})
+
+        # Per-state summary stats
+        self.graph.query("""
+            MATCH (u:University)
+            WHERE u.state <> "" AND ($states IS NULL OR u.state IN $states)
+            WITH u ORDER BY u.rank ASC
+            WITH u.state AS state,
+                 collect(u.name) AS names,
+                 count(u) AS n,
+                 avg(u.tuition_fee) AS avg_fee,
+                 min(u.tuition_fee) AS min_fee,
+                 max(u.tuition_fee) AS max_fee,
+                 avg(u.acceptance_rate_pct) AS avg_acceptance
+            MERGE (s:StateSummary {state: state})
+            SET s.universities_by_rank = names,
+                s.university_count = n,
+                s.avg_tuition = avg_fee,
+                s.min_tuition = min_fee,
+                s.max_tuition = max_fee,
+                s.avg_acceptance_rate_pct = avg_acceptance,
+                s.updated_at = timestamp()
+            WITH s, state
+            MATCH (l:Location {state: state})
+            MERGE (l)-[:HAS_STATE_SUMMARY]->(s)
+        """, params={"states": states})
+
+        self.graph.query("""
+            MATCH (s:StateSummary)
+            WHERE ($states IS NULL OR s.state IN $states)
+              AND NOT EXISTS { MATCH (u:University) WHERE u.state = s.state }
+            DETACH DELETE s
+        """, params={"states": states})
+
+        # Per-test counts and the best-ranked universities that don't require it
+        self.graph.query("""
+            MATCH (t:Test)
+            WHERE $tests IS NULL OR t.name IN $tests
+            OPTIONAL MATCH (u:University)-[:REQUIRES_TEST]->(t)
+            WITH t, count(u) AS n
+            OPTIONAL MATCH (other:University)
+            WHERE NOT (other)-[:REQUIRES_TEST]->(t)
+            WITH t, n, other ORDER BY other.rank ASC
+            WITH t, n, collect(other.name) AS without_test
+            MERGE (s:TestSummary {test: t.name})
+            SET s.university_count = n,
+                s.universities_not_requiring_by_rank = without_test,
+                s.updated_at = timestamp()
+            MERGE (t)-[:HAS_TEST_SUMMARY]->(s)
+        """, params={"tests": tests})
+
+        self.graph.query("""
+            MATCH (s:TestSummary)
+            WHERE ($tests IS NULL OR s.test IN $tests)
+              AND NOT EXISTS { MATCH (:Test {name: s.test}) }
+            DETACH DELETE s
+        """, params={"tests": tests})
+
+        print("Aggregate views refreshed!")
  
-    def populate_with_llm(self):
+    def populate_with_llm(self, workers=None, rate=None, batch_size=None, resume=True, publish=True):
+        """Build the graph from documents with LLMGraphTransformer.
+
+        Extraction runs concurrently under a rate limit, results are cached per
+        document and written in batches; with ``resume`` a rerun skips the
+        documents an earlier, unfinished run already wrote.
+        """
+        def _on_progress(done, total):
+            print(f"LLM extraction: {done}/{total} documents")
+            self._report("llm_extraction", done, total)
+
         prompt_template = PromptTemplate(
            template="Keep in mind that the context is about educational institutions and related topics. Users wil ask about the details about various universities, courses, admission processes, and other related information. Use the context to provide accurate and relevant answers. so keep nodes and relationship accordingly",
         )
@@ -306,20 +548,101 @@ class GraphService:
                 prompt=prompt_template
             )
 
-        graph_doc = transformer.convert_to_graph_documents(docs)
-        self.graph.add_graph_documents(graph_doc)
+        summary = extract_to_graph(
+            transformer,
+            self.graph,
+            docs,
+            cache=ExtractionCache(os.path.join(LLMGraphConfig.WORK_DIR, "documents")),
+            checkpoint=Checkpoint(os.path.join(LLMGraphConfig.WORK_DIR, "checkpoint.txt"), reset=not resume),
+            workers=workers or LLMGraphConfig.WORKERS,
+            rate=LLMGraphConfig.RATE_PER_S if rate is None else rate,
+            batch_size=batch_size or LLMGraphConfig.BATCH_SIZE,
+            on_progress=_on_progress
+        )
+        print(f"LLM extraction finished: {summary}")
+        if publish:
+            self.publish()
+        else:
+            self.graph.refresh_schema()
+
+    def _migrate_vector_index(self, dimensions, quantized):
+        """Reshape ``university_index`` and the stored vectors in place.
+
+        The index is dropped and recreated when its dimensions or quantization
+        differ from the configured ones. Stored vectors longer than
+        ``dimensions`` are truncated and re-normalised in Neo4j, and shorter
+        ones are removed so ``Neo4jVector`` re-embeds them.
+        """
+        rows = self.graph.query(
+            "SHOW VECTOR INDEXES YIELD name, options WHERE name = $name RETURN options",
+            params={"name": VECTOR_INDEX_NAME}
+        )
+        if rows:
+            config = (rows[0]["options"] or {}).get("indexConfig", {})
+            if (config.get("vector.dimensions") != dimensions
+                    or bool(config.get("vector.quantization.enabled", False)) != quantized):
+                print(f"Dropping {VECTOR_INDEX_NAME}: {config.get('vector.dimensions')} dimensions, "
+                      f"quantization {config.get('vector.quantization.enabled', False)}")
+                self.graph.query(f"DROP INDEX {VECTOR_INDEX_NAME} IF EXISTS")
+
+        truncated = self.graph.query(
+            f"""
+            MATCH (u:University) WHERE size(u.{VECTOR_PROPERTY}) > $dimensions
+            WITH u, u.{VECTOR_PROPERTY}[0..$dimensions] AS v
+            WITH u, v, sqrt(reduce(s = 0.0, x IN v | s + x * x)) AS norm
+            CALL db.create.setNodeVectorProperty(u, '{VECTOR_PROPERTY}', [x IN v | CASE WHEN norm = 0 THEN x ELSE x / norm END])
+            RETURN count(u) AS count
+            """,
+            params={"dimensions": dimensions}
+        )
+        removed = self.graph.query(
+            f"""
+            MATCH (u:University) WHERE size(u.{VECTOR_PROPERTY}) < $dimensions
+            REMOVE u.{VECTOR_PROPERTY}
+            RETURN count(u) AS count
+            """,
+            params={"dimensions": dimensions}
+        )
+        if truncated[0]["count"] or removed[0]["count"]:
+            print(f"Vectors truncated to {dimensions} dimensions: {truncated[0]['count']}, "
+                  f"removed for re-embedding: {removed[0]['count']}")
+
+        # Quantization is set either way: Neo4j 5.23+ enables it by default
+        create_index = f"""
+            CREATE VECTOR INDEX {VECTOR_INDEX_NAME} IF NOT EXISTS
+            FOR (n:University) ON (n.{VECTOR_PROPERTY})
+            OPTIONS {{indexConfig: {{
+                `vector.dimensions`: $dimensions,
+                `vector.similarity_function`: 'cosine'%s
+            }}}}
+        """
+        try:
+            self.graph.query(
+                create_index % ",\n                `vector.quantization.enabled`: $quantized",
+                params={"dimensions": dimensions, "quantized": quantized}
+            )
+        except Exception:
+            if quantized:
+                raise
+            # Servers before 5.23 don't know the option and never quantize
+            self.graph.query(create_index % "", params={"dimensions": dimensions})
 
     def create_vector_store(self):
+        self._report("vector_store", 0, 1)
+        embedding = self._vector_embeddings()
         try:
+            self._migrate_vector_index(
+                len(embedding.embed_query("dimension probe")), VectorStoreConfig.INDEX_QUANTIZATION
+            )
             self.vector_store = Neo4jVector.from_existing_graph(
-            embedding=self.embeddings,
+            embedding=embedding,
             url=Neo4jConfig.URI,
             username=Neo4jConfig.USER,
             password=Neo4jConfig.PASSWORD,
-            index_name="university_index",
+            index_name=VECTOR_INDEX_NAME,
             node_label="University",
-            text_node_properties=["name", "location", "website", "rank", "tuition_fee", "acceptance_rate"],  # Fixed: 'rank' not 'Rank'
-            embedding_node_property="embedding",
+            text_node_properties=VECTOR_TEXT_PROPERTIES,
+            embedding_node_property=VECTOR_PROPERTY,
             search_type='hybrid' 
             )
             print("Vector store created successfully!")
@@ -327,6 +650,7 @@ class GraphService:
             print(f"Warning: Could not create vector store: {e}")
             print("Semantic retrieval will not be available")
             self.vector_store = None
+        self._report("vector_store", 1, 1)
 
 
 
@@ -0,0 +1,165 @@
+"""
+Concurrent, resumable LLM graph extraction for ``GraphService.populate_with_llm``.
+
+Documents are extracted by a pool of workers under a shared rate limit, each
+result is cached on disk by content hash, completed documents are written to
+Neo4j in batches, and a checkpoint file records what has been written so a
+rerun resumes where the previous one stopped; one failure or timeout costs
+only its own document. A run that ends without failures clears the checkpoint,
+so the next one writes every document again (from the extraction cache where
+the content is unchanged).
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+
+def content_hash(doc) -> str:
+    raw = json.dumps([doc.page_content, doc.metadata], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Graph documents extracted per source document, keyed by content hash."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def set(self, key: str, graph_documents) -> None:
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(graph_documents, f)
+        os.replace(tmp_path, self._path(key))
+
+
+class Checkpoint:
+    """Append-only record of content hashes already written to Neo4j."""
+
+    def __init__(self, path: str, reset: bool = False):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if reset and os.path.exists(path):
+            os.remove(path)
+        self._done = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._done = {line.strip() for line in f if line.strip()}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._done
+
+    def mark(self, keys: List[str]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for key in keys:
+                f.write(key + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._done.update(keys)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._done = set()
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def extract_to_graph(
+    transformer,
+    graph,
+    docs: List[Any],
+    cache: ExtractionCache,
+    checkpoint: Checkpoint,
+    workers: int = 4,
+    rate: float = 0.0,
+    batch_size: int = 20,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, int]:
+    """Extract ``docs`` concurrently and write them to ``graph`` in batches.
+
+    Documents already in ``checkpoint`` are skipped; failures are reported
+    and left out of the checkpoint so the next run retries them. Once every
+    document has been written the checkpoint is cleared.
+    """
+    keyed = [(content_hash(doc), doc) for doc in docs]
+    pending = [(key, doc) for key, doc in keyed if key not in checkpoint]
+    summary = {"total": len(docs), "skipped": len(docs) - len(pending), "cached": 0, "extracted": 0, "failed": 0, "written": 0}
+    limiter = RateLimiter(rate)
+
+    def _extract(key: str, doc):
+        graph_documents = cache.get(key)
+        if graph_documents is not None:
+            return graph_documents, True
+        limiter.wait()
+        graph_documents = transformer.convert_to_graph_documents([doc])
+        cache.set(key, graph_documents)
+        return graph_documents, False
+
+    batch, batch_keys = [], []
+
+    def _flush():
+        if not batch_keys:
+            return
+        graph.add_graph_documents(batch)
+        checkpoint.mark(batch_keys)
+        summary["written"] += len(batch_keys)
+        batch.clear()
+        batch_keys.clear()
+
+    done = summary["skipped"]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(_extract, key, doc): key for key, doc in pending}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                graph_documents, from_cache = future.result()
+            except Exception as e:
+                summary["failed"] += 1
+                print(f"Extraction failed for document {key[:12]}: {e}")
+            else:
+                summary["cached" if from_cache else "extracted"] += 1
+                batch.extend(graph_documents)
+                batch_keys.append(key)
+                if len(batch_keys) >= batch_size:
+                    _flush()
+            done += 1
+            if on_progress is not None:
+                on_progress(done, summary["total"])
+    _flush()
+    if summary["failed"] == 0:
+        checkpoint.clear()
+    return summary
@@ -0,0 +1,201 @@
+"""Replay-based load generator.
+
+Replays a query log written by the API (``QUERY_LOG_PATH``) at a configurable
+rate and concurrency, then reports throughput, latency percentiles, cache
+hit rate and error rate.
+
+Two targets:
+  - in-process (default): drives ``main.chat`` with the real chain built on
+    the ``replay`` stand-ins, which answer with the recorded responses after
+    sleeping the recorded stage timings, so no Gemini or Neo4j is needed.
+    Caches are private to the run and nothing is written to the query log;
+  - ``--url``: sends real HTTP requests to a running deployment.
+
+Latency is measured from each request's *scheduled* start, so queueing in
+the generator itself is counted instead of hidden.
+
+Run:
+  python loadgen.py --log queries.jsonl --qps 20 --concurrency 8 --duration 60
+  python loadgen.py --log queries.jsonl --profile 5:30,20:30,50:30 --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from query_log import read_query_log
+
+
+def parse_profile(profile: Optional[str], qps: float, duration: float) -> List[Tuple[float, float]]:
+    """``"5:30,20:60"`` -> [(5 qps, 30 s), (20 qps, 60 s)]; defaults to constant ``qps``."""
+    if not profile:
+        return [(qps, duration)]
+    steps = []
+    for step in profile.split(","):
+        rate, seconds = step.split(":")
+        steps.append((float(rate), float(seconds)))
+    return steps
+
+
+def schedule(steps: List[Tuple[float, float]]) -> List[float]:
+    """Start offsets (seconds) for every request across the profile."""
+    offsets, start = [], 0.0
+    for rate, seconds in steps:
+        if rate > 0:
+            count = int(rate * seconds)
+            offsets.extend(start + i / rate for i in range(count))
+        start += seconds
+    return offsets
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class _InProcessTarget:
+    def __init__(self, records: List[Dict[str, Any]], speed: float, deadline_ms: Optional[int]):
+        from config import CacheConfig, ChatConfig
+
+        # Set before main is imported: every cache it (and the chain) builds is
+        # in-memory and private to this run, and no query log is opened
+        CacheConfig.BACKEND = "memory"
+        ChatConfig.QUERY_LOG_PATH = ""
+
+        import main
+        from fastapi import HTTPException
+        from ragchain import create_hybrid_rag_chain
+        from replay import ReplayGraphService
+
+        self._main = main
+        self._http_exception = HTTPException
+        self._deadline_ms = deadline_ms
+        service = ReplayGraphService(records, speed)
+        main._graph_service = service
+        main._hybrid_chain = create_hybrid_rag_chain(service)
+        main._chain_epoch = service.epoch.current()
+        # One event loop, like uvicorn's, shared by every generator thread
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="loadgen-loop", daemon=True).start()
+
+    def send(self, question: str, graph_only: bool) -> Tuple[int, bool, List[str]]:
+        request = self._main.ChatRequest(question=question, graph_only=graph_only, deadline_ms=self._deadline_ms)
+        try:
+            response = asyncio.run_coroutine_threadsafe(self._main.chat(request), self._loop).result()
+            return 200, response.cached, response.degradations
+        except self._http_exception as e:
+            return e.status_code, False, []
+
+
+class _HttpTarget:
+    def __init__(self, url: str, timeout: float, deadline_ms: Optional[int]):
+        import requests
+
+        self._session = requests.Session()
+        self._url = url.rstrip("/") + "/chat"
+        self._timeout = timeout
+        self._deadline_ms = deadline_ms
+
+    def send(self, question: str, graph_only: bool) -> Tuple[int, bool, List[str]]:
+        body = {"question": question, "graph_only": graph_only}
+        if self._deadline_ms is not None:
+            body["deadline_ms"] = self._deadline_ms
+        response = self._session.post(self._url, json=body, timeout=self._timeout)
+        if response.status_code != 200:
+            return response.status_code, False, []
+        body = response.json()
+        return 200, bool(body.get("cached")), body.get("degradations") or []
+
+
+def run(records: List[Dict[str, Any]], offsets: List[float], target, concurrency: int, shuffle: bool, seed: int) -> Dict[str, Any]:
+    if not records:
+        raise ValueError("Query log contains no records")
+    rng = random.Random(seed)
+    order = list(records)
+    if shuffle:
+        rng.shuffle(order)
+
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    degradations: Dict[str, int] = {}
+    cache_hits = 0
+
+    def _one(record: Dict[str, Any], scheduled_at: float):
+        nonlocal cache_hits
+        try:
+            status, cached, degraded = target.send(record["question"], record.get("mode") == "graph_only")
+        except Exception:
+            status, cached, degraded = 0, False, []  # transport error
+        latency_ms = (time.monotonic() - scheduled_at) * 1000
+        with lock:
+            latencies.append(latency_ms)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            cache_hits += int(cached)
+            for name in degraded:
+                degradations[name] = degradations.get(name, 0) + 1
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, offset in enumerate(offsets):
+            scheduled_at = started + offset
+            delay = scheduled_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(_one, order[i % len(order)], scheduled_at)
+    wall_s = time.monotonic() - started
+
+    total = len(latencies)
+    ok = statuses.get("200", 0)
+    return {
+        "requests": total,
+        "wall_s": round(wall_s, 2),
+        "throughput_rps": round(ok / wall_s, 2) if wall_s else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 1),
+            "p90": round(_percentile(latencies, 90), 1),
+            "p99": round(_percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1) if latencies else 0.0,
+        },
+        "cache_hit_rate": round(cache_hits / ok, 3) if ok else 0.0,
+        "error_rate": round((total - ok) / total, 3) if total else 0.0,
+        "statuses": statuses,
+        "degradations": degradations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded query log against the chatbot")
+    parser.add_argument("--log", required=True, help="JSONL query log written via QUERY_LOG_PATH")
+    parser.add_argument("--qps", type=float, default=10.0, help="constant request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds at --qps")
+    parser.add_argument("--profile", help="stepped rate profile 'qps:seconds,...' (overrides --qps/--duration)")
+    parser.add_argument("--concurrency", type=int, default=8, help="max requests in flight")
+    parser.add_argument("--url", help="base URL of a running API; in-process replay when omitted")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay stand-in latencies this many times faster")
+    parser.add_argument("--timeout", type=float, default=60.0, help="HTTP timeout per request")
+    parser.add_argument("--deadline-ms", type=int, help="latency budget sent with each request (server default when omitted)")
+    parser.add_argument("--shuffle", action="store_true", help="shuffle the log instead of replaying in order")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    records = list(read_query_log(args.log))
+    if args.url:
+        target = _HttpTarget(args.url, args.timeout, args.deadline_ms)
+    else:
+        target = _InProcessTarget(records, args.speed, args.deadline_ms)
+    offsets = schedule(parse_profile(args.profile, args.qps, args.duration))
+    report = run(records, offsets, target, args.concurrency, args.shuffle, args.seed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
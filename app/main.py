@@ -3,21 +3,41 @@
 
  - /health endpoint
  - /chat endpoint (question -> answer)
+ - /chat/batch endpoint (many questions, deduplicated, run concurrently)
+ - /admin/reingest endpoints (background re-ingestion with a hot swap of the chain)
 
 Run:
   uvicorn main:app --host 0.0.0.0 --port 8000
 """
 
+import asyncio
+import json
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import lru_cache
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from ragchain import create_hybrid_rag_chain
+from admission import AdmissionController, Overloaded, PRIORITY_CHEAP, PRIORITY_FULL
+from cache_backend import create_cache_backend
+from cache_snapshot import SnapshotWriter, load_snapshot, save_snapshot
+from query_log import QueryLogger
+from config import AdmissionConfig, CacheConfig, ChatConfig, EmbeddingConfig, ReingestConfig
+from embedding import preload_model
+from ragchain import create_hybrid_rag_chain, Deadline, DeadlineExceeded
 from graph_service import GraphService
+from reingest import EpochWatcher, IngestionRunner, JobAlreadyRunning
+
+
+if EmbeddingConfig.MODE == "preload":
+	# Runs at import, i.e. in the master when started with gunicorn --preload,
+	# so forked workers share the model weights copy-on-write
+	preload_model()
 
 
 app = FastAPI(title="EduConnect Chatbot API", version="0.1.0")
@@ -26,11 +46,12 @@ app = FastAPI(title="EduConnect Chatbot API", version="0.1.0")
 _init_lock = threading.Lock()
 _graph_service: Optional[GraphService] = None
 _hybrid_chain = None
-_default_graph_only: bool = False  # Toggle for graph-only vs hybrid mode
+# Graph epoch the serving chain's schema and retriever were built at
+_chain_epoch: Optional[int] = None
 
 
 def _initialize_if_needed() -> None:
-	global _graph_service, _hybrid_chain
+	global _graph_service, _hybrid_chain, _chain_epoch
 	if _hybrid_chain is not None:
 		return
 	with _init_lock:
@@ -46,6 +67,7 @@ def _initialize_if_needed() -> None:
 			_graph_service.create_vector_store()
 		
 		_hybrid_chain = create_hybrid_rag_chain(_graph_service)
+		_chain_epoch = _graph_service.epoch.current()
 		elapsed = time.time() - start
 		print(f"[INIT] Graph + Hybrid chain ready in {elapsed:.2f}s")
 
@@ -55,6 +77,7 @@ class ChatRequest(BaseModel):
 	graph_only: Optional[bool] = None  # If None, uses default setting
 	stream: Optional[bool] = False  
 	include_context: Optional[bool] = False
+	deadline_ms: Optional[int] = None  # Latency budget; if None, uses DEFAULT_DEADLINE_MS
 
 
 class ChatResponse(BaseModel):
@@ -67,41 +90,168 @@ class ChatResponse(BaseModel):
 	# Optional metadata
 	graph_answer: Optional[str] = None
 	semantic_chunks: Optional[int] = None
+	# Steps skipped to meet the deadline: skipped_semantic, skipped_synthesis, stale_cache
+	degradations: List[str] = []
+
+
 
+_cache = create_cache_backend("answers", max_size=CacheConfig.ANSWER_CACHE_SIZE)
+# Last full answer per question regardless of epoch, served only when the
+# deadline is blown; kept apart so it never evicts or snapshots with live answers
+_stale = create_cache_backend("stale", max_size=CacheConfig.STALE_CACHE_SIZE)
+# Runtime settings (e.g. default mode) share the cache backend so that a
+# POST /mode on one worker is seen by all of them. They never expire.
+_settings = create_cache_backend("settings", max_size=16, ttl=None)
 
 
-class _LRUCache:
-	def __init__(self, max_size: int = 64):
-		self.max_size = max_size
-		self._data: Dict[str, Any] = {}
-		self._order: list[str] = []
-		self._lock = threading.Lock()
+# Optional JSONL record of /chat traffic for replay with loadgen.py
+_query_log: Optional[QueryLogger] = QueryLogger(ChatConfig.QUERY_LOG_PATH) if ChatConfig.QUERY_LOG_PATH else None
 
-	def get(self, key: str):
-		with self._lock:
-			if key in self._data:
-				self._order.remove(key)
-				self._order.append(key)
-				return self._data[key]
-			return None
+# Caps concurrent chain invocations in this worker; cache hits bypass it
+_admission = AdmissionController(
+	max_concurrency=AdmissionConfig.MAX_CONCURRENCY,
+	max_queue=AdmissionConfig.MAX_QUEUE,
+	max_queue_wait=AdmissionConfig.MAX_QUEUE_WAIT_S,
+)
 
-	def set(self, key: str, value: Any):
-		with self._lock:
-			if key in self._data:
-				self._order.remove(key)
-			elif len(self._order) >= self.max_size:
-				oldest = self._order.pop(0)
-				self._data.pop(oldest, None)
-			self._data[key] = value
-			self._order.append(key)
 
+def _get_default_graph_only() -> bool:
+	value = _settings.get("default_graph_only")
+	return bool(value) if value is not None else False
 
-_cache = _LRUCache(max_size=128)
+
+_snapshot_writer: Optional[SnapshotWriter] = None
+_epoch_watcher: Optional[EpochWatcher] = None
+_ready = threading.Event()
+
+
+def _build_serving_chain(job) -> tuple:
+	"""Ingest (per ``job.source``) and build a new service + chain off the request path."""
+	# publish=False: the epoch is only bumped once the new chain is serving
+	service = GraphService(
+		build_graph=job.source == "structured",
+		on_progress=job.progress,
+		publish=False,
+		with_vector_store=job.source != "llm",
+	)
+	if job.source == "llm":
+		service.populate_with_llm(publish=False)
+		service.create_vector_store()
+	if getattr(service, "vector_store", None) is None:
+		raise RuntimeError("Vector store could not be created")
+	job.update(stage="chain", done=0, total=0)
+	return service, create_hybrid_rag_chain(service)
+
+
+def _swap_serving_chain(job, service: GraphService, chain) -> int:
+	"""Install a freshly built service + chain; requests already running keep the old ones."""
+	global _graph_service, _hybrid_chain, _chain_epoch
+	with _init_lock:
+		_graph_service, _hybrid_chain = service, chain
+	# Bumping after the swap keeps answers from the old chain out of the new epoch;
+	# the bump invalidates the answer and Cypher caches on every worker
+	epoch = service.epoch.current() if job.source == "reload" else service.publish()
+	_chain_epoch = epoch
+	return epoch
+
+
+_ingestion = IngestionRunner(_build_serving_chain, _swap_serving_chain)
+
+
+def _load_warmup_questions(path: str) -> List[tuple]:
+	"""Read (question, graph_only) pairs from a JSON list or a plain text file."""
+	with open(path, "r", encoding="utf-8") as f:
+		if path.endswith(".json"):
+			entries = json.load(f)
+		else:
+			entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+	questions = []
+	for entry in entries:
+		if isinstance(entry, dict):
+			questions.append((entry["question"], _resolve_mode(entry.get("graph_only"))))
+		else:
+			questions.append((str(entry), _resolve_mode(None)))
+	return questions
+
+
+def _warm_up() -> None:
+	"""Exercise the embedding model, the Neo4j pool and the hot-question list."""
+	start = time.time()
+	_graph_service.embeddings.embed_query("warm-up")
+
+	pool_size = max(1, ChatConfig.WARMUP_NEO4J_CONNECTIONS)
+	with ThreadPoolExecutor(max_workers=pool_size) as pool:
+		list(pool.map(lambda _: _graph_service.graph.query("RETURN 1 AS ok"), range(pool_size)))
+
+	questions = []
+	if ChatConfig.WARMUP_QUESTIONS_FILE:
+		try:
+			questions = _load_warmup_questions(ChatConfig.WARMUP_QUESTIONS_FILE)
+		except Exception as e:
+			print(f"[WARMUP] Could not read {ChatConfig.WARMUP_QUESTIONS_FILE}: {e}")
+	pending = [(q, g) for q, g in questions if _cache.get(_cache_key(q, g)) is None]
+	failed = 0
+	if pending:
+		with ThreadPoolExecutor(max_workers=max(1, ChatConfig.BATCH_MAX_CONCURRENCY)) as pool:
+			futures = [pool.submit(_run_chain, q, g) for q, g in pending]
+			for future in as_completed(futures):
+				if future.exception() is not None:
+					failed += 1
+	print(
+		f"[WARMUP] Done in {time.time() - start:.2f}s: "
+		f"{len(pending) - failed}/{len(pending)} questions answered, "
+		f"{len(questions) - len(pending)} already cached"
+	)
 
 
 @app.on_event("startup")
 def startup_event():
+	global _snapshot_writer, _epoch_watcher
+	if CacheConfig.SNAPSHOT_ENABLED:
+		restored = load_snapshot(_cache, CacheConfig.SNAPSHOT_PATH)
+		print(f"[INIT] Restored {restored} cached answers from snapshot")
 	_initialize_if_needed()
+	if ChatConfig.WARMUP_ENABLED:
+		_warm_up()
+	if CacheConfig.SNAPSHOT_ENABLED and CacheConfig.SNAPSHOT_INTERVAL_S > 0:
+		_snapshot_writer = SnapshotWriter(
+			_cache,
+			CacheConfig.SNAPSHOT_PATH,
+			CacheConfig.SNAPSHOT_INTERVAL_S,
+			max_entries=CacheConfig.ANSWER_CACHE_SIZE,
+		)
+		_snapshot_writer.start()
+	if ReingestConfig.RELOAD_ON_EPOCH_CHANGE:
+		_epoch_watcher = EpochWatcher(
+			_ingestion,
+			current_epoch=lambda: _graph_service.epoch.current(),
+			chain_epoch=lambda: _chain_epoch,
+			interval=ReingestConfig.RELOAD_CHECK_INTERVAL_S,
+			max_backoff=ReingestConfig.RELOAD_MAX_BACKOFF_S,
+		)
+		_epoch_watcher.start()
+	_ready.set()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+	if _epoch_watcher is not None:
+		_epoch_watcher.stop()
+	if _snapshot_writer is not None:
+		_snapshot_writer.stop()
+	if CacheConfig.SNAPSHOT_ENABLED:
+		saved = save_snapshot(_cache, CacheConfig.SNAPSHOT_PATH, max_entries=CacheConfig.ANSWER_CACHE_SIZE)
+		print(f"[SHUTDOWN] Saved {saved} cached answers to snapshot")
+	if _query_log is not None:
+		_query_log.close()
+
+
+@app.get("/ready")
+def ready():
+	"""Readiness probe: 503 until the cache is restored and warm-up has finished."""
+	if not _ready.is_set():
+		raise HTTPException(status_code=503, detail="Warming up")
+	return {"status": "ready"}
 
 
 @app.get("/health")
@@ -114,75 +264,351 @@ def health():
 		raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-	if not req.question or not req.question.strip():
-		raise HTTPException(status_code=400, detail="Question must not be empty")
+def _resolve_mode(graph_only: Optional[bool]) -> bool:
+	# Request-specific setting wins over the global default
+	return _get_default_graph_only() if graph_only is None else graph_only
 
-	_initialize_if_needed()
 
-	# Determine mode: use request-specific setting or global default
-	use_graph_only = _default_graph_only if req.graph_only is None else req.graph_only
-	cache_key = f"{req.question}::{use_graph_only}"
-	
-	cached_payload = _cache.get(cache_key)
-	if cached_payload is not None:
-		return ChatResponse(
-			answer=cached_payload["answer"],
-			cached=True,
-			elapsed_ms=0.0,
-			mode=cached_payload.get("mode", "hybrid"),
-			graph_used=cached_payload.get("graph_used", True),
-			semantic_used=cached_payload.get("semantic_used", True),
-			graph_answer=cached_payload.get("graph_answer") if req.include_context else None,
-			semantic_chunks=cached_payload.get("semantic_chunks") if req.include_context else None,
-		)
-	
-	start = time.time()
+def _stale_key(question: str, use_graph_only: bool) -> str:
+	return f"{question}::{use_graph_only}"
+
+
+def _cache_key(question: str, use_graph_only: bool) -> str:
+	# The graph epoch invalidates every cached answer when the data is reloaded
+	epoch = _graph_service.epoch.current() if _graph_service is not None else 0
+	return f"{epoch}::{question}::{use_graph_only}"
+
+
+def _build_response(payload: Dict[str, Any], cached: bool, elapsed_ms: float, include_context: bool) -> ChatResponse:
+	return ChatResponse(
+		answer=payload["answer"],
+		cached=cached,
+		elapsed_ms=elapsed_ms,
+		mode=payload.get("mode", "hybrid"),
+		graph_used=payload.get("graph_used", True),
+		semantic_used=payload.get("semantic_used", True),
+		graph_answer=payload.get("graph_answer") if include_context else None,
+		semantic_chunks=payload.get("semantic_chunks") if include_context else None,
+		degradations=payload.get("degradations") or [],
+	)
+
+
+def _new_deadline(deadline_ms: Optional[int]) -> Deadline:
+	"""Start the latency budget for one request (DEFAULT_DEADLINE_MS when unset, 0 = unbounded)."""
+	deadline_ms = ChatConfig.DEFAULT_DEADLINE_MS if deadline_ms is None else deadline_ms
+	return Deadline(deadline_ms / 1000 if deadline_ms and deadline_ms > 0 else None)
+
+
+def _run_chain(question: str, use_graph_only: bool, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+	"""Invoke the hybrid chain for one question and cache the resulting payload.
+
+	Degraded answers are returned but not cached. If the deadline runs out
+	before any answer exists, the last full answer for the question is served
+	(``stale: True``); without one ``DeadlineExceeded`` propagates.
+	"""
+	# Key on the epoch seen before invoking so a concurrent reload can't mislabel the answer
+	cache_key = _cache_key(question, use_graph_only)
+	invoke_params = {"question": question}
+	if use_graph_only:
+		invoke_params["graph_only"] = True
+	if deadline is not None and deadline.budget_s is not None:
+		invoke_params["deadline"] = deadline
 	try:
-		invoke_params = {"question": req.question}
-		if use_graph_only:
-			invoke_params["graph_only"] = True
 		result = _hybrid_chain.invoke(invoke_params)
-	except Exception as e:
-		raise HTTPException(status_code=500, detail=f"Inference failed: {e}")
-	elapsed_ms = (time.time() - start) * 1000
+	except DeadlineExceeded:
+		stale_payload = _stale.get(_stale_key(question, use_graph_only))
+		if stale_payload is None:
+			raise
+		return {**stale_payload, "degradations": ["stale_cache"], "stale": True}
 
 	semantic_docs = result.get("semantic_documents") or []
-	mode = result.get("mode", "hybrid")
-	
 	payload = {
 		"answer": result["answer"],
-		"mode": mode,
+		"mode": result.get("mode", "hybrid"),
 		"graph_answer": result.get("graph_answer"),
 		"semantic_chunks": len(semantic_docs),
 		"graph_used": bool(result.get("graph_answer")),
 		"semantic_used": len(semantic_docs) > 0,
+		"degradations": result.get("degradations") or [],
+		"timings": result.get("timings") or {},
 	}
-	_cache.set(cache_key, payload)
+	if not payload["degradations"]:
+		_cache.set(cache_key, payload)
+		_stale.set(_stale_key(question, use_graph_only), payload)
+	return payload
+
+
+async def _run_admitted(question: str, use_graph_only: bool, deadline: Deadline) -> Dict[str, Any]:
+	"""``_run_chain`` on a worker thread behind admission control; raises ``Overloaded`` when shed.
+
+	Requests queue on the event loop, so waiting holds no worker thread, and
+	the queue wait is spent from ``deadline``.
+	"""
+	if not AdmissionConfig.ENABLED:
+		return await run_in_threadpool(_run_chain, question, use_graph_only, deadline)
+	priority = PRIORITY_CHEAP if use_graph_only else PRIORITY_FULL
+	loop = asyncio.get_running_loop()
+	await _admission.acquire(priority, timeout=deadline.remaining())
+	start = time.monotonic()
+	try:
+		return await run_in_threadpool(_run_chain, question, use_graph_only, deadline)
+	finally:
+		# Stages abandoned on timeout still load Gemini / Neo4j: the slot is
+		# only freed once they have finished
+		deadline.when_settled(
+			lambda: loop.call_soon_threadsafe(_admission.release, time.monotonic() - start)
+		)
 
-	return ChatResponse(
-		answer=payload["answer"],
-		cached=False,
-		elapsed_ms=elapsed_ms,
-		mode=payload["mode"],
-		graph_used=payload["graph_used"],
-		semantic_used=payload["semantic_used"],
-		graph_answer=payload["graph_answer"] if req.include_context else None,
-		semantic_chunks=payload["semantic_chunks"] if req.include_context else None,
+
+def _log_query(question: str, use_graph_only: bool, cache: str, status: int, elapsed_ms: float, payload: Optional[Dict[str, Any]] = None) -> None:
+	if _query_log is None:
+		return
+	record = {
+		"question": question,
+		"mode": "graph_only" if use_graph_only else "hybrid",
+		"cache": cache,  # hit, miss or stale
+		"status": status,
+		"elapsed_ms": round(elapsed_ms, 1),
+	}
+	# Hits only repeat an answer already recorded by its miss, so they stay compact
+	if payload is not None and cache != "hit":
+		record.update({
+			"timings": {k: round(v, 1) for k, v in (payload.get("timings") or {}).items()},
+			"degradations": payload.get("degradations") or [],
+			"semantic_chunks": payload.get("semantic_chunks"),
+			"answer": payload.get("answer"),
+			"graph_answer": payload.get("graph_answer"),
+		})
+	try:
+		_query_log.log(record)
+	except Exception as e:
+		print(f"Warning: Could not write query log: {e}")
+
+
+def _lookup(question: str, graph_only: Optional[bool]) -> tuple:
+	"""Resolve the mode and check the answer cache (blocking: may hit SQLite or the KV server)."""
+	_initialize_if_needed()
+	use_graph_only = _resolve_mode(graph_only)
+	return use_graph_only, _cache.get(_cache_key(question, use_graph_only))
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest):
+	if not req.question or not req.question.strip():
+		raise HTTPException(status_code=400, detail="Question must not be empty")
+
+	use_graph_only, cached_payload = await run_in_threadpool(_lookup, req.question, req.graph_only)
+	if cached_payload is not None:
+		_log_query(req.question, use_graph_only, "hit", 200, 0.0)
+		return _build_response(cached_payload, True, 0.0, req.include_context)
+
+	start = time.time()
+	deadline = _new_deadline(req.deadline_ms)
+	try:
+		payload = await _run_admitted(req.question, use_graph_only, deadline)
+	except Overloaded as e:
+		_log_query(req.question, use_graph_only, "miss", 429, (time.time() - start) * 1000)
+		raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+	except DeadlineExceeded as e:
+		_log_query(req.question, use_graph_only, "miss", 504, (time.time() - start) * 1000)
+		raise HTTPException(status_code=504, detail=str(e))
+	except Exception as e:
+		_log_query(req.question, use_graph_only, "miss", 500, (time.time() - start) * 1000)
+		raise HTTPException(status_code=500, detail=f"Inference failed: {e}")
+	elapsed_ms = (time.time() - start) * 1000
+
+	stale = bool(payload.get("stale"))
+	_log_query(req.question, use_graph_only, "stale" if stale else "miss", 200, elapsed_ms, payload)
+	return _build_response(payload, stale, elapsed_ms, req.include_context)
+
+
+class BatchChatItem(BaseModel):
+	question: str
+	graph_only: Optional[bool] = None  # If None, uses default setting
+
+
+class BatchChatRequest(BaseModel):
+	items: List[BatchChatItem]
+	include_context: Optional[bool] = False
+	stream: Optional[bool] = False  # Emit NDJSON lines as each item finishes
+	max_concurrency: Optional[int] = None  # Capped by BATCH_MAX_CONCURRENCY
+	deadline_ms: Optional[int] = None  # Per-item latency budget; if None, uses DEFAULT_DEADLINE_MS
+
+
+class BatchChatResult(BaseModel):
+	index: int
+	question: str
+	response: Optional[ChatResponse] = None
+	error: Optional[str] = None
+
+
+class BatchChatResponse(BaseModel):
+	results: List[BatchChatResult]
+	elapsed_ms: float
+	unique_questions: int
+	cache_hits: int
+
+
+def _plan_batch(req: BatchChatRequest) -> tuple:
+	"""Deduplicate a batch within itself and against the answer cache (blocking)."""
+	_initialize_if_needed()
+	include_context = bool(req.include_context)
+
+	# Deduplicate within the batch: each cache key maps to every index asking it
+	groups: Dict[str, List[int]] = {}
+	jobs: Dict[str, tuple] = {}
+	for i, item in enumerate(req.items):
+		use_graph_only = _resolve_mode(item.graph_only)
+		key = _cache_key(item.question, use_graph_only)
+		groups.setdefault(key, []).append(i)
+		jobs.setdefault(key, (item.question, use_graph_only))
+
+	# Deduplicate against the answer cache
+	results: Dict[int, BatchChatResult] = {}
+	cache_hits = 0
+	pending: Dict[str, tuple] = {}
+	for key, (question, use_graph_only) in jobs.items():
+		cached_payload = _cache.get(key)
+		if cached_payload is None:
+			pending[key] = (question, use_graph_only)
+			continue
+		cache_hits += 1
+		for i in groups[key]:
+			results[i] = BatchChatResult(
+				index=i,
+				question=req.items[i].question,
+				response=_build_response(cached_payload, True, 0.0, include_context),
+			)
+	return groups, jobs, results, cache_hits, pending
+
+
+@app.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(req: BatchChatRequest):
+	if not req.items:
+		raise HTTPException(status_code=400, detail="Batch must contain at least one item")
+	if len(req.items) > ChatConfig.BATCH_MAX_ITEMS:
+		raise HTTPException(
+			status_code=400,
+			detail=f"Batch too large: {len(req.items)} items (max {ChatConfig.BATCH_MAX_ITEMS})"
+		)
+	for i, item in enumerate(req.items):
+		if not item.question or not item.question.strip():
+			raise HTTPException(status_code=400, detail=f"Question at index {i} must not be empty")
+
+	start = time.time()
+	include_context = bool(req.include_context)
+	groups, jobs, results, cache_hits, pending = await run_in_threadpool(_plan_batch, req)
+
+	limit = req.max_concurrency or ChatConfig.BATCH_MAX_CONCURRENCY
+	limit = max(1, min(limit, ChatConfig.BATCH_MAX_CONCURRENCY))
+	limiter = asyncio.Semaphore(limit)
+
+	async def _timed_run(key: str, question: str, use_graph_only: bool):
+		async with limiter:
+			item_start = time.time()
+			try:
+				payload = await _run_admitted(question, use_graph_only, _new_deadline(req.deadline_ms))
+			except Exception as e:
+				return key, None, 0.0, e
+			return key, payload, (time.time() - item_start) * 1000, None
+
+	async def _completed():
+		"""Yield (key, results) for each unique pending question as it finishes."""
+		tasks = [
+			asyncio.ensure_future(_timed_run(key, question, use_graph_only))
+			for key, (question, use_graph_only) in pending.items()
+		]
+		try:
+			for next_done in asyncio.as_completed(tasks):
+				key, payload, elapsed_ms, error = await next_done
+				group = []
+				if error is None:
+					response = _build_response(payload, bool(payload.get("stale")), elapsed_ms, include_context)
+					for i in groups[key]:
+						group.append(BatchChatResult(index=i, question=req.items[i].question, response=response))
+				else:
+					message = str(error) if isinstance(error, (Overloaded, DeadlineExceeded)) else f"Inference failed: {error}"
+					for i in groups[key]:
+						group.append(BatchChatResult(index=i, question=req.items[i].question, error=message))
+				yield key, group
+		finally:
+			# Client went away mid-stream: drop the items that haven't been admitted yet
+			for task in tasks:
+				task.cancel()
+
+	if req.stream:
+		async def _stream():
+			# Cache hits are ready immediately; the rest follow in completion order
+			for i in sorted(results):
+				yield json.dumps(results[i].dict()) + "\n"
+			async for _, group in _completed():
+				for result in group:
+					yield json.dumps(result.dict()) + "\n"
+
+		return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+	async for _, group in _completed():
+		for result in group:
+			results[result.index] = result
+
+	return BatchChatResponse(
+		results=[results[i] for i in range(len(req.items))],
+		elapsed_ms=(time.time() - start) * 1000,
+		unique_questions=len(jobs),
+		cache_hits=cache_hits,
 	)
 
 
+@app.get("/metrics")
+def metrics():
+	"""Counters for admission control, the Cypher result cache and the cost guard."""
+	_initialize_if_needed()
+	return {"admission": _admission.stats(), **_hybrid_chain.stats()}
+
+
+class ReingestRequest(BaseModel):
+	source: Optional[str] = "structured"  # structured, llm or reload (rebuild the chain only)
+
+
+@app.post("/admin/reingest", status_code=202)
+def start_reingest(req: ReingestRequest):
+	"""Start re-ingestion in the background; live traffic keeps using the current chain."""
+	try:
+		job = _ingestion.start(req.source or "structured")
+	except ValueError as e:
+		raise HTTPException(status_code=400, detail=str(e))
+	except JobAlreadyRunning as e:
+		raise HTTPException(status_code=409, detail=str(e))
+	return job.to_dict()
+
+
+@app.get("/admin/reingest")
+def latest_reingest():
+	job = _ingestion.latest()
+	if job is None:
+		raise HTTPException(status_code=404, detail="No ingestion job has run")
+	return job.to_dict()
+
+
+@app.get("/admin/reingest/{job_id}")
+def get_reingest(job_id: str):
+	job = _ingestion.get(job_id)
+	if job is None:
+		raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+	return job.to_dict()
+
+
 @app.post("/clear-cache")
 def clear_cache():
-	global _cache
-	_cache = _LRUCache(max_size=128)
+	_cache.clear()
+	_stale.clear()
 	return {"cleared": True}
 
 
 @app.get("/mode")
 def get_mode():
 	"""Get current default mode setting"""
+	_default_graph_only = _get_default_graph_only()
 	return {
 		"default_graph_only": _default_graph_only,
 		"mode": "graph_only" if _default_graph_only else "hybrid"
@@ -195,12 +621,11 @@ class ModeRequest(BaseModel):
 
 @app.post("/mode")
 def set_mode(req: ModeRequest):
-	global _default_graph_only
-	_default_graph_only = req.graph_only
+	_settings.set("default_graph_only", req.graph_only)
 	return {
 		"updated": True,
-		"default_graph_only": _default_graph_only,
-		"mode": "graph_only" if _default_graph_only else "hybrid"
+		"default_graph_only": req.graph_only,
+		"mode": "graph_only" if req.graph_only else "hybrid"
 	}
 
 
@@ -0,0 +1,46 @@
+"""
+Compact JSONL log of /chat traffic.
+
+Each line records the question, mode and outcome; misses and stale answers
+also record the timings and the answer that was produced, so ``loadgen.py``
+can replay a realistic traffic mix against a candidate build with the
+recorded LLM / Neo4j responses standing in for the real services. Enabled by setting ``QUERY_LOG_PATH``.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator
+
+
+class QueryLogger:
+    """Thread-safe, append-only JSONL writer."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def log(self, record: Dict[str, Any]) -> None:
+        line = json.dumps({"ts": round(time.time(), 3), **record}, separators=(",", ":"), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def read_query_log(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield records from a query log, skipping malformed lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
@@ -1,8 +1,97 @@
 from langchain.chains import RetrievalQA
 from langchain.prompts import ChatPromptTemplate, PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
 from langchain_neo4j.chains.graph_qa.cypher import GraphCypherQAChain
-from typing import Any, Dict, List
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
 import json
+import threading
+import time
+
+from cache_backend import create_cache_backend
+from config import CacheConfig, CypherGuardConfig, CypherPromptConfig
+from cypher_cache import CachedCypherGraph, GRAPH_META_LABEL
+from cypher_guard import CypherGuard, CypherRejected
+from cypher_schema import SchemaSelector, format_examples
+
+# Rows of a graph query handed to the QA prompt; also the LIMIT the guard appends
+GRAPH_TOP_K = 10
+
+# Few-shot (question, Cypher) pairs for Cypher generation
+CYPHER_EXAMPLES = [
+    ("universities in California",
+     "MATCH (u:University) WHERE u.state = 'California' RETURN u.name"),
+    ("selective universities under 40000 tuition",
+     "MATCH (u:University) WHERE u.acceptance_rate_pct < 20 AND u.tuition_fee < 40000 "
+     "RETURN u.name, u.acceptance_rate_pct, u.tuition_fee, u.tuition_currency ORDER BY u.tuition_fee"),
+    ("top 10 universities",
+     "MATCH (u:University)-[:BELONGS_TO_TIER]->(t:Tier {name: 'Top 10'})"),
+    ("universities offering computer science",
+     "MATCH (u:University)-[:OFFERS]->(p:Program) WHERE toLower(p.name) CONTAINS 'computer science'"),
+    ("Test required in a specific university",
+     "MATCH (u:University {name: 'MIT'})-[:REQUIRES_TEST]->(t:Test) RETURN t.name"),
+    ("cheapest universities for computer science",
+     "MATCH (r:ProgramCostRanking {program: 'Computer Science'}) "
+     "RETURN r.universities_by_tuition[..5] AS universities, r.tuition_fees[..5] AS tuition_fees"),
+    ("average tuition by state",
+     "MATCH (s:StateSummary) RETURN s.state, s.avg_tuition, s.university_count ORDER BY s.avg_tuition"),
+    ("top 10 universities that don't require the SAT",
+     "MATCH (s:TestSummary {test: 'SAT'}) RETURN s.universities_not_requiring_by_rank[..10] AS universities"),
+]
+
+
+# Initial stage latency estimates (seconds) before real measurements arrive
+DEFAULT_STAGE_ESTIMATES = {"graph": 2.0, "semantic": 0.3, "synthesis": 2.0}
+ESTIMATE_ALPHA = 0.2
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the latency budget ran out before a usable answer existed."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded during {stage} stage")
+        self.stage = stage
+
+
+class Deadline:
+    """Latency budget for one request; ``budget_s=None`` means unbounded.
+
+    Stages that time out after they started can't be stopped; they are
+    recorded here so the caller can keep counting them as load.
+    """
+
+    def __init__(self, budget_s: Optional[float]):
+        self.budget_s = budget_s
+        self.expires_at = time.monotonic() + budget_s if budget_s is not None else None
+        self._abandoned: List[Future] = []
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float("inf")
+        return self.expires_at - time.monotonic()
+
+    def abandon(self, future: Future) -> None:
+        self._abandoned.append(future)
+
+    def when_settled(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` once every abandoned stage has finished (now if there are none)."""
+        pending = [f for f in self._abandoned if not f.done()]
+        if not pending:
+            callback()
+            return
+        lock = threading.Lock()
+        left = [len(pending)]
+
+        def _done(_future):
+            with lock:
+                left[0] -= 1
+                last = left[0] == 0
+            if last:
+                callback()
+
+        for future in pending:
+            future.add_done_callback(_done)
 
 
 class HybridRAGChain:
@@ -11,16 +100,27 @@ class HybridRAGChain:
     2. Performs semantic retrieval from the Neo4j vector index
     3. Synthesizes a final answer using both sources
 
+    With a ``deadline`` (or ``budget_s``) in the inputs, semantic retrieval and
+    then synthesis are skipped when the remaining budget can't cover them;
+    the result lists what was skipped under ``degradations``.
+
     Usage:
         hybrid = create_hybrid_rag_chain(graph_service)
         result = hybrid.invoke({"question": "What universities offer Computer Science with low tuition?"})
         print(result["answer"])
     """
 
-    def __init__(self, graph_chain, retriever, llm):
+    def __init__(self, graph_chain, retriever, llm, max_workers: int = 16):
         self.graph_chain = graph_chain
         self.retriever = retriever
         self.llm = llm
+        # Runs stages that have a deadline, so they can be abandoned on timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hybrid-stage")
+        self._abandoned = {"running": 0, "total": 0, "cancelled": 0}
+        self._abandoned_lock = threading.Lock()
+        # Moving averages of stage latency (seconds), used to decide what to skip
+        self.stage_estimates = dict(DEFAULT_STAGE_ESTIMATES)
+        self._estimate_lock = threading.Lock()
 
         self.combine_prompt = ChatPromptTemplate.from_template(
             (
@@ -39,26 +139,79 @@ class HybridRAGChain:
             )
         )
 
+    def _run_stage(self, name: str, deadline: Optional[Deadline], fn, *args):
+        """Run one stage, bounded by the deadline, and update its latency estimate."""
+        start = time.monotonic()
+        if deadline is None or deadline.budget_s is None:
+            result = fn(*args)
+        else:
+            future = self._executor.submit(fn, *args)
+            try:
+                result = future.result(timeout=max(deadline.remaining(), 0.0))
+            except FutureTimeoutError:
+                self._abandon(future, deadline)
+                raise DeadlineExceeded(name)
+        elapsed = time.monotonic() - start
+        with self._estimate_lock:
+            previous = self.stage_estimates[name]
+            self.stage_estimates[name] = (1 - ESTIMATE_ALPHA) * previous + ESTIMATE_ALPHA * elapsed
+        return result, elapsed
+
+    def _abandon(self, future: Future, deadline: Deadline) -> None:
+        """Drop a timed-out stage: cancel it if still queued, else let it finish in the background."""
+        if future.cancel():
+            with self._abandoned_lock:
+                self._abandoned["cancelled"] += 1
+            return
+        with self._abandoned_lock:
+            self._abandoned["running"] += 1
+            self._abandoned["total"] += 1
+
+        def _finished(_future):
+            with self._abandoned_lock:
+                self._abandoned["running"] -= 1
+
+        future.add_done_callback(_finished)
+        deadline.abandon(future)
+
     def invoke(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         question = inputs.get("question") or inputs.get("query")
         if not question:
             raise ValueError("'question' key is required in inputs")
         
         graph_only = inputs.get("graph_only", False)
+        # Optional latency budget: stages are skipped when the budget is nearly spent
+        deadline = inputs.get("deadline")
+        if deadline is None and inputs.get("budget_s"):
+            deadline = Deadline(inputs["budget_s"])
+        degradations: List[str] = []
+        timings: Dict[str, float] = {}
 
         # 1. Structured graph QA (returns cypher + answer)
-        graph_result = self.graph_chain.invoke({"query": question})
-        graph_answer = graph_result.get("result", "")
-        cypher_steps = graph_result.get("intermediate_steps", [])
+        try:
+            graph_result, elapsed = self._run_stage("graph", deadline, self.graph_chain.invoke, {"query": question})
+            timings["graph_ms"] = elapsed * 1000
+            graph_answer = graph_result.get("result", "")
+            cypher_steps = graph_result.get("intermediate_steps", [])
+        except CypherRejected as e:
+            graph_result = {}
+            graph_answer = f"(Note: graph query was rejected by the cost guard: {e.reason})"
+            cypher_steps = [{"query": e.query, "rejected": e.reason}]
 
-        # 2. Semantic retrieval (skip if graph_only mode)
+        # 2. Semantic retrieval (skip if graph_only mode, or if the budget can't cover it)
         semantic_docs = []
         if not graph_only and self.retriever is not None:
-            try:
-                semantic_docs = self.retriever.invoke(question)
-            except Exception as e:
-                semantic_docs = []
-                graph_answer += f"\n(Note: semantic retrieval failed: {e})"
+            if deadline is not None and deadline.remaining() < self.stage_estimates["semantic"] + self.stage_estimates["synthesis"]:
+                degradations.append("skipped_semantic")
+            else:
+                try:
+                    semantic_docs, elapsed = self._run_stage("semantic", deadline, self.retriever.invoke, question)
+                    timings["semantic_ms"] = elapsed * 1000
+                except DeadlineExceeded:
+                    degradations.append("skipped_semantic")
+                except Exception as e:
+                    semantic_docs = []
+                    graph_answer += f"\n(Note: semantic retrieval failed: {e})"
 
         # 3. Prepare context based on mode
         if graph_only:
@@ -66,15 +219,27 @@ class HybridRAGChain:
         else:
             semantic_context = "\n---\n".join(d.page_content for d in semantic_docs[:6]) if semantic_docs else "(No semantic context retrieved)"
 
-        # 4. LLM synthesis with appropriate context
-        messages = self.combine_prompt.format_messages(
-            question=question,
-            graph_answer=graph_answer,
-            semantic_context=semantic_context,
-            cypher_steps=json.dumps(cypher_steps, indent=2) if cypher_steps else "(No cypher details)"
-        )
-        final_response = self.llm.invoke(messages)
-        final_text = getattr(final_response, "content", str(final_response))
+        # 4. LLM synthesis with appropriate context; the graph answer stands in when out of time
+        final_text = None
+        if deadline is not None and deadline.remaining() < self.stage_estimates["synthesis"]:
+            degradations.append("skipped_synthesis")
+        else:
+            messages = self.combine_prompt.format_messages(
+                question=question,
+                graph_answer=graph_answer,
+                semantic_context=semantic_context,
+                cypher_steps=json.dumps(cypher_steps, indent=2) if cypher_steps else "(No cypher details)"
+            )
+            try:
+                final_response, elapsed = self._run_stage("synthesis", deadline, self.llm.invoke, messages)
+                timings["synthesis_ms"] = elapsed * 1000
+                final_text = getattr(final_response, "content", str(final_response))
+            except DeadlineExceeded:
+                degradations.append("skipped_synthesis")
+        if final_text is None:
+            if not graph_result.get("result"):
+                raise DeadlineExceeded("synthesis")
+            final_text = graph_answer
 
         return {
             "answer": final_text.strip(),
@@ -82,9 +247,22 @@ class HybridRAGChain:
             "semantic_documents": semantic_docs,
             "cypher_steps": cypher_steps,
             "raw_graph_result": graph_result,
-            "mode": "graph_only" if graph_only else "hybrid"
+            "mode": "graph_only" if graph_only else "hybrid",
+            "degradations": degradations,
+            "timings": timings
         }
 
+    def stats(self) -> Dict[str, Any]:
+        """Counters for abandoned stages, the Cypher result cache and the cost guard."""
+        graph = self.graph_chain.graph
+        with self._abandoned_lock:
+            stats = {"abandoned_stages": dict(self._abandoned)}
+        if hasattr(graph, "stats"):
+            stats["cypher_cache"] = graph.stats()
+        if getattr(graph, "guard", None) is not None:
+            stats["cypher_guard"] = graph.guard.stats()
+        return stats
+
 def create_hybrid_rag_chain(graph_service):
     """
     Create a hybrid RAG chain using:
@@ -92,11 +270,6 @@ def create_hybrid_rag_chain(graph_service):
     2. Neo4j vector embeddings (semantic search)
     """
 
-    schema =  graph_service.graph.schema
-    schema = schema.replace("{", "(")
-    schema = schema.replace("}", ")")
-
-
     cypher_prompt = PromptTemplate(
         template="""
         You are an expert at converting natural language questions about universities into Cypher queries.
@@ -110,37 +283,72 @@ def create_hybrid_rag_chain(graph_service):
         3. Use WHERE clauses for filtering
         4. Return relevant properties
         5. Use LIMIT when appropriate
-        6. Handle case-insensitive matching with toLower()
-        7. For acceptance rates, remember they're stored as strings with % (e.g., "7%")
+        6. Use toLower() for case-insensitive matching on free-text fields only (e.g. university, program or scholarship names in CONTAINS searches), never on the typed properties in guideline 7
+        7. Use the typed properties for filters: u.acceptance_rate_pct is a number (7.0 for "7%"), u.tuition_fee is a number in u.tuition_currency, and u.city / u.state / u.country hold the location parts exactly as written (e.g. 'California'); compare them directly, without toLower() or string parsing, so indexes are used
         8. Combine multiple conditions with AND / OR as needed
         9. When Opportunities ie Scholarships are mentioned, include them in the query
-        10. if no query can be generated, Answer based your own knowledge base if you are sure. otherwise, say "I don't know"
+        10. For rankings, cheapest/most expensive lists, averages or counts per program, state or test, read the precomputed ProgramCostRanking, StateSummary and TestSummary nodes instead of aggregating over universities
+        11. if no query can be generated, Answer based your own knowledge base if you are sure. otherwise, say "I don't know"
 
         Examples:
-        - "universities in California" -> MATCH (u:University)-[:LOCATED_IN]->(l:Location) WHERE toLower(l.state) CONTAINS 'california'
-        - "top 10 universities" -> MATCH (u:University)-[:BELONGS_TO_TIER]->(t:Tier {{"name": "Top 10"}})
-        - "universities offering computer science" -> MATCH (u:University)-[:OFFERS]->(p:Program) WHERE toLower(p.name) CONTAINS 'computer science'
-        - "Test required in a specific university" -> MATCH (u:University {{"name": "MIT"}})-[:REQUIRES_TEST]->(t:Test) RETURN t.name
+        {examples}
 
         Question: {question}
         Generate only the Cypher query, no explanations
         Cypher:""",
-        input_variables=["schema", "question"]
+        input_variables=["schema", "question"],
+        partial_variables={"examples": format_examples(CYPHER_EXAMPLES)}
     )
-   
 
+    # Generated Cypher is checked (EXPLAIN, bounded, read-only, timed out) before it runs
+    guard = None
+    if CypherGuardConfig.ENABLED:
+        guard = CypherGuard(
+            graph_service.graph,
+            timeout=CypherGuardConfig.TIMEOUT_S,
+            default_limit=GRAPH_TOP_K,
+            max_hops=CypherGuardConfig.MAX_HOPS,
+            max_estimated_rows=CypherGuardConfig.MAX_ESTIMATED_ROWS,
+            cartesian_max_rows=CypherGuardConfig.CARTESIAN_MAX_ROWS
+        )
+
+    # Identical Cypher (from differently phrased questions) is answered from cache
+    cypher_graph = CachedCypherGraph(
+        graph_service.graph,
+        graph_service.epoch,
+        create_cache_backend("cypher", max_size=CacheConfig.CYPHER_CACHE_SIZE),
+        guard=guard
+    )
 
     graph_chain = GraphCypherQAChain.from_llm(
         llm=graph_service.llm,
-        graph=graph_service.graph,
+        graph=cypher_graph,
+        exclude_types=[GRAPH_META_LABEL],
         verbose=False,
         return_intermediate_steps=True,
         validate_cypher=True,
-        top_k=10,
+        top_k=GRAPH_TOP_K,
         cypher_prompt=cypher_prompt,
         allow_dangerous_requests=True
     )
 
+    # Only the labels, relationships and examples relevant to each question go into the prompt
+    if CypherPromptConfig.SELECTOR_ENABLED:
+        selector = SchemaSelector(
+            graph_service.embeddings,
+            graph_service.graph.get_structured_schema,
+            CYPHER_EXAMPLES,
+            max_labels=CypherPromptConfig.MAX_LABELS,
+            max_examples=CypherPromptConfig.MAX_EXAMPLES,
+            exclude_types=[GRAPH_META_LABEL]
+        )
+        graph_chain.cypher_generation_chain = (
+            RunnableLambda(selector.prompt_inputs)
+            | cypher_prompt
+            | graph_service.llm
+            | StrOutputParser()
+        )
+
     retriever = None
     if getattr(graph_service, "vector_store", None) is not None:
         try:
@@ -0,0 +1,171 @@
+"""
+Background re-ingestion jobs for the API.
+
+``IngestionRunner`` runs one job at a time on a daemon thread: ``build(job)``
+does the slow work (ingestion, vector store, new chain) off the request path
+while the current chain keeps serving, and ``swap(job, *built)`` installs the
+result. Jobs report their
+stage and progress through ``IngestionJob.to_dict``.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# structured: universities.json, llm: LLMGraphTransformer, reload: no ingestion
+SOURCES = ("structured", "llm", "reload")
+
+
+class JobAlreadyRunning(RuntimeError):
+    def __init__(self, job: "IngestionJob"):
+        super().__init__(f"Ingestion job {job.id} is already {job.state}")
+        self.job = job
+
+
+class IngestionJob:
+    def __init__(self, source: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.source = source
+        self.state = "queued"  # queued, running, succeeded or failed
+        self.stage: Optional[str] = None
+        self.done = 0
+        self.total = 0
+        self.epoch: Optional[int] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def update(self, **fields) -> None:
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    def progress(self, stage: str, done: int, total: int) -> None:
+        """``GraphService`` ``on_progress`` callback."""
+        self.update(stage=stage, done=done, total=total)
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("queued", "running")
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                "id": self.id,
+                "source": self.source,
+                "state": self.state,
+                "stage": self.stage,
+                "done": self.done,
+                "total": self.total,
+                "epoch": self.epoch,
+                "error": self.error,
+                "elapsed_s": round(end - self.started_at, 2) if self.started_at else 0.0,
+            }
+
+
+class IngestionRunner:
+    """Runs ``build`` then ``swap`` for one job at a time on a background thread."""
+
+    def __init__(self, build: Callable[[IngestionJob], tuple], swap: Callable[..., Optional[int]], history: int = 20):
+        self._build = build
+        self._swap = swap
+        self._history = history
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._current: Optional[IngestionJob] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        with self._lock:
+            return self._current is not None and self._current.active
+
+    def start(self, source: str) -> IngestionJob:
+        if source not in SOURCES:
+            raise ValueError(f"Unknown source '{source}' (expected one of {', '.join(SOURCES)})")
+        with self._lock:
+            if self._current is not None and self._current.active:
+                raise JobAlreadyRunning(self._current)
+            job = IngestionJob(source)
+            self._current = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._history:
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self._run, args=(job,), name=f"ingest-{job.id}", daemon=True).start()
+        return job
+
+    def _run(self, job: IngestionJob) -> None:
+        job.update(state="running", started_at=time.time())
+        print(f"[INGEST] Job {job.id} ({job.source}) started")
+        try:
+            built = self._build(job)
+            job.update(stage="swap", done=0, total=0)
+            epoch = self._swap(job, *built)
+            job.update(state="succeeded", epoch=epoch, finished_at=time.time())
+            print(f"[INGEST] Job {job.id} finished in {job.finished_at - job.started_at:.2f}s (epoch {epoch})")
+        except Exception as e:
+            job.update(state="failed", error=str(e), finished_at=time.time())
+            print(f"[INGEST] Job {job.id} failed: {e}")
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self) -> Optional[IngestionJob]:
+        with self._lock:
+            return next(reversed(self._jobs.values()), None)
+
+
+class EpochWatcher(threading.Thread):
+    """Starts a ``reload`` job when the graph epoch moves past the serving chain's.
+
+    Picks up ingestion done by another worker or process (e.g. a standalone
+    ``GraphService(build_graph=True)``). After a failed reload the next one
+    waits ``interval * 2 ** failures`` seconds, capped at ``max_backoff``.
+    """
+
+    def __init__(self, runner: IngestionRunner, current_epoch: Callable[[], Optional[int]], chain_epoch: Callable[[], Optional[int]], interval: float, max_backoff: float = 300.0):
+        super().__init__(name="epoch-watcher", daemon=True)
+        self.runner = runner
+        self.current_epoch = current_epoch
+        self.chain_epoch = chain_epoch
+        self.interval = max(0.5, interval)
+        self.max_backoff = max(self.interval, max_backoff)
+        self.failures = 0
+        self._job: Optional[IngestionJob] = None
+        self._retry_at = 0.0
+        self._stop_event = threading.Event()
+
+    def _backing_off(self) -> bool:
+        """Account for the last reload job once it has finished; True while waiting to retry."""
+        job = self._job
+        if job is not None and not job.active:
+            self._job = None
+            if job.state == "failed":
+                self.failures += 1
+                delay = min(self.interval * 2 ** self.failures, self.max_backoff)
+                self._retry_at = time.monotonic() + delay
+                print(f"Warning: Reload job {job.id} failed, next attempt in {delay:.0f}s")
+            else:
+                self.failures = 0
+                self._retry_at = 0.0
+        return time.monotonic() < self._retry_at
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                if self.runner.running or self.chain_epoch() is None or self._backing_off():
+                    continue
+                if self.current_epoch() != self.chain_epoch():
+                    self._job = self.runner.start("reload")
+            except JobAlreadyRunning:
+                continue
+            except Exception as e:
+                print(f"Warning: Epoch watcher failed: {e}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
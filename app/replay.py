@@ -0,0 +1,241 @@
+"""
+Stand-ins for Gemini, Neo4j and the embedding model that play back a query log.
+
+``ReplayGraphService`` has the attributes ``create_hybrid_rag_chain`` reads
+from ``GraphService`` (graph, llm, embeddings, vector_store, epoch), so the
+real chain runs on top of it: schema pruning, the Cypher cache, the cost
+guard and deadlines behave as in production, while every model and database
+call sleeps its recorded stage timing and returns the recorded answer.
+"""
+
+import hashlib
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Used when a question never missed the cache in the log, so no timings exist
+DEFAULT_REPLAY_MS = {"graph_ms": 800.0, "semantic_ms": 150.0, "synthesis_ms": 900.0}
+# Share of the recorded graph stage spent generating Cypher; the rest goes to the graph answer
+CYPHER_SHARE = 0.5
+
+_QUESTION = re.compile(r"Question: (.*)")
+_USER_QUESTION = re.compile(r"User question: (.*)")
+
+# The ingested labels and relationships, enough for schema pruning and the Cypher corrector
+REPLAY_SCHEMA = {
+    "node_props": {
+        "University": [
+            {"property": "name", "type": "STRING"},
+            {"property": "rank", "type": "INTEGER"},
+            {"property": "tuition_fee", "type": "FLOAT"},
+            {"property": "tuition_currency", "type": "STRING"},
+            {"property": "acceptance_rate_pct", "type": "FLOAT"},
+            {"property": "city", "type": "STRING"},
+            {"property": "state", "type": "STRING"},
+            {"property": "country", "type": "STRING"},
+        ],
+        "Location": [{"property": "name", "type": "STRING"}],
+        "Program": [{"property": "name", "type": "STRING"}],
+        "Requirements": [{"property": "university", "type": "STRING"}],
+        "Test": [{"property": "name", "type": "STRING"}],
+        "Scholarship": [{"property": "type", "type": "STRING"}],
+        "Tier": [{"property": "name", "type": "STRING"}],
+    },
+    "rel_props": {},
+    "relationships": [
+        {"start": "University", "type": "LOCATED_IN", "end": "Location"},
+        {"start": "University", "type": "OFFERS", "end": "Program"},
+        {"start": "University", "type": "HAS_REQUIREMENTS", "end": "Requirements"},
+        {"start": "University", "type": "REQUIRES_TEST", "end": "Test"},
+        {"start": "University", "type": "OFFERS_SCHOLARSHIP", "end": "Scholarship"},
+        {"start": "University", "type": "SHARES_PROGRAM_WITH", "end": "University"},
+        {"start": "University", "type": "BELONGS_TO_TIER", "end": "Tier"},
+    ],
+    "metadata": {"constraint": [], "index": []},
+}
+
+# What the cost guard's EXPLAIN sees: a cheap plan that passes every check
+_REPLAY_PLAN = {"operatorType": "ProduceResults@neo4j", "args": {"EstimatedRows": 1.0}, "children": []}
+_REPLAY_ROWS = [{"name": "Replay University"}]
+
+
+def _last_match(pattern: re.Pattern, text: str) -> str:
+    matches = pattern.findall(text)
+    return matches[-1] if matches else ""
+
+
+def replay_cypher(question: str) -> str:
+    """Deterministic Cypher per question, without a LIMIT so the guard's rewrite runs."""
+    digest = hashlib.sha1(question.encode("utf-8")).hexdigest()[:12]
+    return f"MATCH (u:University) WHERE u.name = '{digest}' RETURN u.name AS name"
+
+
+class ReplayLog:
+    """Recorded responses and stage timings by question and mode."""
+
+    def __init__(self, records: List[Dict[str, Any]], speed: float = 1.0):
+        self.speed = speed
+        self._records: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for record in records:
+            if record.get("answer") is None:
+                continue
+            modes = self._records.setdefault(record["question"], {})
+            mode = record.get("mode", "hybrid")
+            # Prefer records that actually ran the chain (they carry stage timings)
+            if mode not in modes or record.get("timings"):
+                modes[mode] = record
+
+    def get(self, question: str, mode: Optional[str] = None) -> Dict[str, Any]:
+        modes = self._records.get(question, {})
+        if mode in modes:
+            return modes[mode]
+        return next(iter(modes.values()), {})
+
+    def sleep(self, question: str, stage: str, mode: Optional[str] = None, share: float = 1.0) -> None:
+        timings = self.get(question, mode).get("timings") or DEFAULT_REPLAY_MS
+        elapsed_ms = timings.get(stage, DEFAULT_REPLAY_MS[stage])
+        time.sleep(elapsed_ms * share / 1000 / self.speed)
+
+
+class ReplayChatModel(BaseChatModel):
+    """Answers the Cypher generation, graph answer and synthesis prompts from the log."""
+
+    replay: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = "\n".join(str(message.content) for message in messages).rstrip()
+        if text.endswith("Cypher:"):
+            question = _last_match(_QUESTION, text)
+            self.replay.sleep(question, "graph_ms", share=CYPHER_SHARE)
+            content = replay_cypher(question)
+        elif text.endswith("Final Answer:"):
+            question = _last_match(_USER_QUESTION, text)
+            mode = "graph_only" if "(Graph-only mode" in text else "hybrid"
+            self.replay.sleep(question, "synthesis_ms", mode)
+            content = self.replay.get(question, mode).get("answer") or "(replayed answer)"
+        else:
+            question = _last_match(_QUESTION, text)
+            self.replay.sleep(question, "graph_ms", share=1 - CYPHER_SHARE)
+            content = self.replay.get(question).get("graph_answer") or "(replayed graph answer)"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+
+class ReplayEmbeddings:
+    """Hashed bag-of-words vectors: cheap, deterministic and close for texts sharing words."""
+
+    def __init__(self, dimensions: int = 64):
+        self.dimensions = dimensions
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dimensions] += 1.0
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+class _ReplayRetriever:
+    def __init__(self, replay: ReplayLog, k: int):
+        self.replay = replay
+        self.k = k
+
+    def invoke(self, question: str) -> List[Document]:
+        self.replay.sleep(question, "semantic_ms", "hybrid")
+        count = min(self.k, self.replay.get(question, "hybrid").get("semantic_chunks") or 0)
+        return [Document(page_content=f"(replayed chunk {i + 1})") for i in range(count)]
+
+
+class ReplayVectorStore:
+    def __init__(self, replay: ReplayLog):
+        self.replay = replay
+
+    def as_retriever(self, search_type: str = "similarity", search_kwargs: Optional[Dict[str, Any]] = None):
+        return _ReplayRetriever(self.replay, (search_kwargs or {}).get("k", 4))
+
+
+class _ReplayRecord(dict):
+    def data(self) -> Dict[str, Any]:
+        return dict(self)
+
+
+class _ReplayResult:
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self._rows = rows
+        self.plan = _REPLAY_PLAN
+
+    def __iter__(self):
+        return (_ReplayRecord(row) for row in self._rows)
+
+    def consume(self) -> "_ReplayResult":
+        return self
+
+
+class _ReplaySession:
+    """Driver session for the cost guard: ``run`` (EXPLAIN) and ``execute_read``."""
+
+    def __enter__(self) -> "_ReplaySession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def run(self, query: str, params: Optional[dict] = None) -> _ReplayResult:
+        return _ReplayResult(_REPLAY_ROWS)
+
+    def execute_read(self, work):
+        return work(self)
+
+
+class _ReplayDriver:
+    def session(self, **kwargs) -> _ReplaySession:
+        return _ReplaySession()
+
+
+class ReplayGraph:
+    """Enough of ``Neo4jGraph`` for the Cypher chain, the cost guard and the health check."""
+
+    def __init__(self):
+        self._driver = _ReplayDriver()
+        self._database = "neo4j"
+
+    @property
+    def get_structured_schema(self) -> Dict[str, Any]:
+        return REPLAY_SCHEMA
+
+    @property
+    def get_schema(self) -> str:
+        return "\n".join(f"{r['start']} -[:{r['type']}]-> {r['end']}" for r in REPLAY_SCHEMA["relationships"])
+
+    def refresh_schema(self) -> None:
+        pass
+
+    def query(self, query: str, params: dict = {}) -> List[Dict[str, Any]]:
+        return [dict(row) for row in _REPLAY_ROWS]
+
+
+class StaticEpoch:
+    def current(self) -> int:
+        return 0
+
+
+class ReplayGraphService:
+    """``GraphService`` look-alike whose model, database and vector index replay ``records``."""
+
+    def __init__(self, records: List[Dict[str, Any]], speed: float = 1.0):
+        self.replay = ReplayLog(records, speed)
+        self.graph = ReplayGraph()
+        self.llm = ReplayChatModel(replay=self.replay)
+        self.embeddings = ReplayEmbeddings()
+        self.vector_store = ReplayVectorStore(self.replay)
+        self.epoch = StaticEpoch()
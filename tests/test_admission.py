@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from admission import PRIORITY_CHEAP, PRIORITY_FULL, AdmissionController, Overloaded
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_admits_up_to_max_concurrency_then_queues():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=2, max_queue=1, max_queue_wait=1.0)
+        await controller.acquire()
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.stats()["queue_depth"] == 1
+        controller.release(0.1)
+        await waiter
+        assert controller.stats()["in_flight"] == 2
+        assert controller.stats()["admitted"] == 3
+
+    run(scenario())
+
+
+def test_sheds_when_queue_is_full():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, max_queue_wait=1.0)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire(PRIORITY_FULL))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as exc:
+            await controller.acquire(PRIORITY_FULL)
+        assert exc.value.reason == "queue_full"
+        assert exc.value.retry_after >= 1
+        controller.release(0.1)
+        await waiter
+
+    run(scenario())
+
+
+def test_zero_length_queue_sheds_instead_of_crashing():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=0)
+        await controller.acquire()
+        with pytest.raises(Overloaded) as exc:
+            await controller.acquire(PRIORITY_CHEAP)
+        assert exc.value.reason == "queue_full"
+
+    run(scenario())
+
+
+def test_cheap_request_displaces_queued_full_request():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, max_queue_wait=1.0)
+        await controller.acquire()
+        full = asyncio.ensure_future(controller.acquire(PRIORITY_FULL))
+        await asyncio.sleep(0)
+        cheap = asyncio.ensure_future(controller.acquire(PRIORITY_CHEAP))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as exc:
+            await full
+        assert exc.value.reason == "displaced"
+        controller.release(0.1)
+        await cheap
+        assert controller.stats()["shed"] == {"displaced": 1}
+
+    run(scenario())
+
+
+def test_queue_wait_is_bounded_by_timeout():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=4, max_queue_wait=5.0)
+        await controller.acquire()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(Overloaded) as exc:
+            await controller.acquire(timeout=0.05)
+        assert exc.value.reason == "queue_timeout"
+        assert loop.time() - started < 1.0
+        assert controller.stats()["queue_depth"] == 0
+
+    run(scenario())
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=4, max_queue_wait=5.0)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.stats()["queue_depth"] == 0
+        controller.release(0.1)
+        assert controller.stats()["in_flight"] == 0
+
+    run(scenario())
+
+
+def test_slot_releases_on_exit():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1)
+        with pytest.raises(RuntimeError):
+            async with controller.slot():
+                raise RuntimeError("boom")
+        assert controller.stats()["in_flight"] == 0
+
+    run(scenario())
@@ -0,0 +1,91 @@
+import time
+
+from cache_backend import (
+    KeyValueCacheBackend,
+    LocalKeyValueStore,
+    MemoryCacheBackend,
+    SQLiteCacheBackend,
+)
+
+
+def test_memory_backend_evicts_least_recently_used():
+    cache = MemoryCacheBackend(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert [key for key, _ in cache.items()] == ["a", "c"]
+
+
+def test_sqlite_backend_round_trip_and_eviction(tmp_path):
+    cache = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), "answers", max_size=2, touch_interval=0)
+    cache.set("a", {"answer": "x"})
+    cache.set("b", [1, 2])
+    assert cache.get("a") == {"answer": "x"}
+    cache.set("c", "z")
+    assert cache.get("b") is None
+    assert dict(cache.items()) == {"a": {"answer": "x"}, "c": "z"}
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert cache.items() == []
+
+
+def test_sqlite_backend_namespaces_are_isolated(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    answers = SQLiteCacheBackend(path, "answers")
+    settings = SQLiteCacheBackend(path, "settings")
+    answers.set("k", 1)
+    settings.set("k", 2)
+    answers.clear()
+    assert answers.get("k") is None
+    assert settings.get("k") == 2
+
+
+def test_sqlite_backend_hit_only_touches_after_interval(tmp_path):
+    cache = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), "answers", touch_interval=3600)
+    cache.set("a", 1)
+    accessed = cache._conn().execute("SELECT accessed FROM cache_entries").fetchone()[0]
+    time.sleep(0.01)
+    assert cache.get("a") == 1
+    assert cache._conn().execute("SELECT accessed FROM cache_entries").fetchone()[0] == accessed
+
+
+def test_sqlite_backend_connects_lazily_and_per_process(tmp_path):
+    path = tmp_path / "sub" / "cache.sqlite3"
+    cache = SQLiteCacheBackend(str(path), "answers")
+    assert not path.exists()
+    cache.set("a", 1)
+    first = cache._conn()
+    cache._pid = -1  # as seen from a forked worker
+    assert cache._conn() is not first
+    assert cache.get("a") == 1
+
+
+def test_key_value_backend_prefixes_and_expires():
+    client = LocalKeyValueStore()
+    answers = KeyValueCacheBackend(client, "answers", ttl=1)
+    settings = KeyValueCacheBackend(client, "settings")
+    answers.set("q", {"answer": "x"})
+    settings.set("q", True)
+    assert answers.get("q") == {"answer": "x"}
+    answers.clear()
+    assert answers.get("q") is None
+    assert settings.items() == [("q", True)]
+
+    client.set("educonnect:answers:old", "1", ex=1)
+    client._data["educonnect:answers:old"] = (b"1", time.time() - 1)
+    assert answers.get("old") is None
+
+
+def test_create_cache_backend_kv_ttl(monkeypatch):
+    import cache_backend
+    from config import CacheConfig
+
+    monkeypatch.setattr(CacheConfig, "BACKEND", "kv")
+    monkeypatch.setattr(CacheConfig, "KV_URL", "local://")
+    monkeypatch.setattr(CacheConfig, "KV_TTL", 60)
+    monkeypatch.setattr(cache_backend, "_kv_client", None)
+    assert cache_backend.create_cache_backend("answers").ttl == 60
+    assert cache_backend.create_cache_backend("settings", ttl=None).ttl is None
@@ -0,0 +1,127 @@
+import pytest
+
+pytest.importorskip("langchain")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+import main
+from cache_backend import MemoryCacheBackend
+from config import ChatConfig
+from ragchain import create_hybrid_rag_chain
+from replay import ReplayGraphService
+
+FAST = {"graph_ms": 1.0, "semantic_ms": 1.0, "synthesis_ms": 1.0}
+SLOW = {"graph_ms": 40.0, "semantic_ms": 1.0, "synthesis_ms": 40.0}
+
+RECORDS = [
+    {"question": "slow", "mode": "hybrid", "answer": "slow answer", "timings": SLOW},
+    {"question": "fast", "mode": "hybrid", "answer": "fast hybrid", "timings": FAST},
+    {"question": "fast", "mode": "graph_only", "answer": "fast graph only", "timings": FAST},
+]
+
+
+class _CountingChain:
+    """The real hybrid chain over replayed services, recording each invocation."""
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.calls = []
+
+    def invoke(self, inputs):
+        self.calls.append((inputs["question"], bool(inputs.get("graph_only"))))
+        return self.chain.invoke(inputs)
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    service = ReplayGraphService(RECORDS)
+    counting = _CountingChain(create_hybrid_rag_chain(service))
+    monkeypatch.setattr(main, "_graph_service", service)
+    monkeypatch.setattr(main, "_hybrid_chain", counting)
+    monkeypatch.setattr(main, "_chain_epoch", service.epoch.current())
+    monkeypatch.setattr(main, "_cache", MemoryCacheBackend())
+    monkeypatch.setattr(main, "_stale", MemoryCacheBackend())
+    monkeypatch.setattr(main, "_settings", MemoryCacheBackend())
+    monkeypatch.setattr(main, "_query_log", None)
+    return counting
+
+
+def _batch(items, **extra):
+    return TestClient(main.app).post("/chat/batch", json={"items": items, "deadline_ms": 0, **extra})
+
+
+def test_duplicates_run_once_and_results_keep_request_order(chain):
+    response = _batch([
+        {"question": "slow"},
+        {"question": "fast"},
+        {"question": "slow"},
+        {"question": "fast"},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert body["unique_questions"] == 2
+    assert body["cache_hits"] == 0
+    assert sorted(chain.calls) == [("fast", False), ("slow", False)]
+    assert [r["index"] for r in body["results"]] == [0, 1, 2, 3]
+    assert [r["question"] for r in body["results"]] == ["slow", "fast", "slow", "fast"]
+    assert [r["response"]["answer"] for r in body["results"]] == [
+        "slow answer", "fast hybrid", "slow answer", "fast hybrid",
+    ]
+
+
+def test_same_question_in_two_modes_is_two_jobs(chain):
+    body = _batch([
+        {"question": "fast", "graph_only": True},
+        {"question": "fast", "graph_only": False},
+    ]).json()
+    assert body["unique_questions"] == 2
+    assert sorted(chain.calls) == [("fast", False), ("fast", True)]
+    assert [r["response"]["mode"] for r in body["results"]] == ["graph_only", "hybrid"]
+    assert [r["response"]["answer"] for r in body["results"]] == ["fast graph only", "fast hybrid"]
+
+
+def test_cache_hits_skip_the_chain(chain):
+    _batch([{"question": "fast"}])
+    assert len(chain.calls) == 1
+
+    body = _batch([{"question": "fast"}, {"question": "slow"}, {"question": "fast"}]).json()
+    assert body["cache_hits"] == 1
+    assert chain.calls == [("fast", False), ("slow", False)]
+    assert [r["response"]["cached"] for r in body["results"]] == [True, False, True]
+
+
+def test_rejects_empty_question_and_oversized_batch(chain, monkeypatch):
+    response = _batch([{"question": "fast"}, {"question": "  "}])
+    assert response.status_code == 400
+    assert "index 1" in response.json()["detail"]
+
+    assert _batch([]).status_code == 400
+
+    monkeypatch.setattr(ChatConfig, "BATCH_MAX_ITEMS", 2)
+    response = _batch([{"question": "fast"}] * 3)
+    assert response.status_code == 400
+    assert "too large" in response.json()["detail"]
+    assert chain.calls == []
+
+
+class _Log:
+    def __init__(self):
+        self.records = []
+
+    def log(self, record):
+        self.records.append(record)
+
+
+def test_query_log_keeps_answers_only_on_misses(chain, monkeypatch):
+    log = _Log()
+    monkeypatch.setattr(main, "_query_log", log)
+    client = TestClient(main.app)
+    for _ in range(2):
+        assert client.post("/chat", json={"question": "fast", "deadline_ms": 0}).status_code == 200
+    miss, hit = log.records
+    assert miss["cache"] == "miss"
+    assert miss["answer"] == "fast hybrid"
+    assert "timings" in miss
+    assert hit["cache"] == "hit"
+    assert set(hit) == {"question", "mode", "cache", "status", "elapsed_ms"}
@@ -0,0 +1,79 @@
+import pytest
+
+from cypher_guard import CypherGuard, CypherRejected
+
+
+@pytest.fixture
+def guard():
+    return CypherGuard(graph=None, default_limit=10, max_hops=3)
+
+
+def test_appends_limit_when_missing(guard):
+    assert guard.rewrite("MATCH (u:University) RETURN u.name;") == "MATCH (u:University) RETURN u.name\nLIMIT 10"
+
+
+def test_keeps_existing_final_limit(guard):
+    query = "MATCH (u:University) RETURN u.name ORDER BY u.rank LIMIT 3"
+    assert guard.rewrite(query) == query
+
+
+def test_limit_before_final_return_does_not_count(guard):
+    query = "MATCH (u:University) WITH u LIMIT 5 MATCH (u)-[:OFFERS]->(p) RETURN p.name"
+    assert guard.rewrite(query) == f"{query}\nLIMIT 10"
+
+
+def test_limit_inside_string_literal_does_not_count(guard):
+    query = "MATCH (p:Program {name: 'RETURN LIMIT'}) RETURN p.name"
+    assert guard.rewrite(query) == f"{query}\nLIMIT 10"
+
+
+def test_union_is_left_alone(guard):
+    query = "MATCH (u:University) RETURN u.name AS name UNION MATCH (p:Program) RETURN p.name AS name"
+    assert guard.rewrite(query) == query
+
+
+def test_no_return_gets_no_limit(guard):
+    assert guard.rewrite("CALL db.labels()") == "CALL db.labels()"
+
+
+@pytest.mark.parametrize(
+    "pattern, bounded",
+    [
+        ("[*]", "[*1..3]"),
+        ("[:SAME_STATE*]", "[:SAME_STATE*1..3]"),
+        ("[r*2..]", "[r*2..3]"),
+        ("[*..9]", "[*1..3]"),
+        ("[*2]", "[*2]"),
+        ("[* {w: 1}]", "[*1..3 {w: 1}]"),
+    ],
+)
+def test_bounds_variable_length_patterns(guard, pattern, bounded):
+    query = f"MATCH (a)-{pattern}-(b) RETURN b LIMIT 1"
+    assert guard.rewrite(query) == f"MATCH (a)-{bounded}-(b) RETURN b LIMIT 1"
+
+
+def test_rejects_paths_longer_than_max_hops(guard):
+    with pytest.raises(CypherRejected) as exc:
+        guard.rewrite("MATCH (a)-[*5..]-(b) RETURN b")
+    assert exc.value.reason == "path_too_long"
+
+
+@pytest.mark.parametrize(
+    "query, reason",
+    [
+        ("MATCH (u:University) DETACH DELETE u", "write_clause"),
+        ("MATCH (u:University) SET u.rank = 1 RETURN u", "write_clause"),
+        ("CALL apoc.periodic.iterate('a', 'b', {})", "procedure_call"),
+        ("CALL dbms.killQueries([])", "procedure_call"),
+    ],
+)
+def test_rejects_writes_and_admin_procedures(guard, query, reason):
+    with pytest.raises(CypherRejected) as exc:
+        guard.rewrite(query)
+    assert exc.value.reason == reason
+    assert guard.stats()["rejected"][reason] == 1
+
+
+def test_write_keywords_inside_strings_are_allowed(guard):
+    query = "MATCH (p:Program {name: 'Data CREATE and DELETE'}) RETURN p LIMIT 1"
+    assert guard.rewrite(query) == query
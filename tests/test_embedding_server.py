@@ -0,0 +1,74 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from embedding import EmbeddingClient
+from embedding_server import serve
+
+
+class _Vector(list):
+    def tolist(self):
+        return list(self)
+
+
+class _FakeModel:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def encode(self, texts):
+        self.batch_sizes.append(len(texts))
+        return [_Vector([float(len(text)), 1.0]) for text in texts]
+
+
+async def _cancel_all():
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.fixture
+def sidecar(tmp_path):
+    socket_path = str(tmp_path / "embed.sock")
+    model = _FakeModel()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(serve(socket_path, "fake", 1.0, 64, model=model), loop)
+    deadline = time.monotonic() + 5
+    while not os.path.exists(socket_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield socket_path, model
+    asyncio.run_coroutine_threadsafe(_cancel_all(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def _texts(count):
+    # Neo4jVector's node text format, roughly 300 bytes per node
+    return [f"\nname:University {i}\nlocation:City, State, Country\nwebsite:https://example.edu/{i}"
+            f"\nrank:{i}\ntuition_fee:55000.0\nacceptance_rate:7%" + " " * 150 for i in range(count)]
+
+
+def test_request_over_64_kib_round_trips(sidecar):
+    socket_path, model = sidecar
+    texts = _texts(1000)
+    assert len("".join(texts)) > 64 * 1024
+    client = EmbeddingClient(socket_path, timeout=10, max_batch=0)  # one request
+    vectors = client.embed(texts)
+    assert vectors == [[float(len(text)), 1.0] for text in texts]
+
+
+def test_client_splits_into_max_batch_chunks(sidecar):
+    socket_path, model = sidecar
+    texts = _texts(150)
+    client = EmbeddingClient(socket_path, timeout=10, max_batch=64)
+    vectors = client.embed(texts)
+    assert vectors == [[float(len(text)), 1.0] for text in texts]
+    assert sum(model.batch_sizes) == 150
+    assert max(model.batch_sizes) <= 64
+    assert client.embed([]) == []
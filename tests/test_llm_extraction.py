@@ -0,0 +1,94 @@
+import os
+import threading
+
+from llm_extraction import Checkpoint, ExtractionCache, content_hash, extract_to_graph
+
+
+class _Doc:
+    def __init__(self, text):
+        self.page_content = text
+        self.metadata = {"source": "test"}
+
+
+class _Transformer:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def convert_to_graph_documents(self, docs):
+        text = docs[0].page_content
+        with self._lock:
+            self.calls.append(text)
+        if text in self.fail:
+            raise RuntimeError("quota exceeded")
+        return [f"graph:{text}"]
+
+
+class _Graph:
+    def __init__(self):
+        self.batches = []
+
+    def add_graph_documents(self, graph_documents):
+        self.batches.append(list(graph_documents))
+
+
+def _setup(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "documents"))
+    path = str(tmp_path / "checkpoint.txt")
+    return cache, path
+
+
+def test_writes_in_batches_and_clears_checkpoint_on_success(tmp_path):
+    cache, path = _setup(tmp_path)
+    docs = [_Doc(f"doc{i}") for i in range(5)]
+    graph = _Graph()
+    progress = []
+    summary = extract_to_graph(
+        _Transformer(), graph, docs, cache, Checkpoint(path), workers=2, batch_size=2,
+        on_progress=lambda done, total: progress.append((done, total)),
+    )
+    assert summary == {"total": 5, "skipped": 0, "cached": 0, "extracted": 5, "failed": 0, "written": 5}
+    assert [len(batch) for batch in graph.batches] == [2, 2, 1]
+    assert sorted(doc for batch in graph.batches for doc in batch) == [f"graph:doc{i}" for i in range(5)]
+    assert progress[-1] == (5, 5)
+    assert not os.path.exists(path)
+
+
+def test_rerun_after_success_rewrites_from_cache(tmp_path):
+    cache, path = _setup(tmp_path)
+    docs = [_Doc("a"), _Doc("b")]
+    extract_to_graph(_Transformer(), _Graph(), docs, cache, Checkpoint(path))
+
+    transformer, graph = _Transformer(), _Graph()
+    summary = extract_to_graph(transformer, graph, docs, cache, Checkpoint(path))
+    assert summary["skipped"] == 0
+    assert summary["cached"] == 2
+    assert summary["written"] == 2
+    assert transformer.calls == []
+
+
+def test_failures_keep_checkpoint_and_rerun_retries_only_them(tmp_path):
+    cache, path = _setup(tmp_path)
+    docs = [_Doc("a"), _Doc("b"), _Doc("c")]
+    summary = extract_to_graph(_Transformer(fail={"b"}), _Graph(), docs, cache, Checkpoint(path))
+    assert summary["failed"] == 1
+    assert summary["written"] == 2
+    checkpoint = Checkpoint(path)
+    assert content_hash(docs[0]) in checkpoint
+    assert content_hash(docs[1]) not in checkpoint
+
+    transformer, graph = _Transformer(), _Graph()
+    summary = extract_to_graph(transformer, graph, docs, cache, Checkpoint(path))
+    assert summary["skipped"] == 2
+    assert summary["written"] == 1
+    assert transformer.calls == ["b"]
+    assert graph.batches == [["graph:b"]]
+    assert not os.path.exists(path)
+
+
+def test_checkpoint_reset_discards_progress(tmp_path):
+    path = str(tmp_path / "checkpoint.txt")
+    Checkpoint(path).mark(["k1", "k2"])
+    assert "k1" in Checkpoint(path)
+    assert "k1" not in Checkpoint(path, reset=True)
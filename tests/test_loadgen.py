@@ -0,0 +1,61 @@
+import pytest
+
+from loadgen import _percentile, parse_profile, run, schedule
+
+
+def test_parse_profile_defaults_to_constant_rate():
+    assert parse_profile(None, 10.0, 30.0) == [(10.0, 30.0)]
+
+
+def test_parse_profile_steps():
+    assert parse_profile("5:30,20:60", 1.0, 1.0) == [(5.0, 30.0), (20.0, 60.0)]
+
+
+def test_schedule_spaces_requests_per_step():
+    assert schedule([(2.0, 2.0), (4.0, 1.0)]) == [0.0, 0.5, 1.0, 1.5, 2.0, 2.25, 2.5, 2.75]
+
+
+def test_schedule_zero_rate_step_is_a_pause():
+    assert schedule([(1.0, 2.0), (0.0, 3.0), (1.0, 1.0)]) == [0.0, 1.0, 5.0]
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert _percentile(values, 50) == 50.0
+    assert _percentile(values, 99) == 99.0
+    assert _percentile([], 50) == 0.0
+
+
+class _Target:
+    def __init__(self):
+        self.seen = []
+
+    def send(self, question, graph_only):
+        self.seen.append((question, graph_only))
+        if question == "boom":
+            raise ConnectionError("down")
+        if question == "busy":
+            return 429, False, []
+        return 200, question == "hot", ["skipped_semantic"] if graph_only else []
+
+
+def test_run_reports_statuses_cache_hits_and_degradations():
+    records = [
+        {"question": "hot", "mode": "hybrid"},
+        {"question": "cold", "mode": "graph_only"},
+        {"question": "busy", "mode": "hybrid"},
+        {"question": "boom", "mode": "hybrid"},
+    ]
+    target = _Target()
+    report = run(records, [0.0] * 8, target, concurrency=4, shuffle=False, seed=0)
+    assert report["requests"] == 8
+    assert report["statuses"] == {"200": 4, "429": 2, "0": 2}
+    assert report["cache_hit_rate"] == 0.5
+    assert report["error_rate"] == 0.5
+    assert report["degradations"] == {"skipped_semantic": 2}
+    assert sorted(target.seen).count(("cold", True)) == 2
+
+
+def test_run_rejects_empty_log():
+    with pytest.raises(ValueError):
+        run([], [0.0], _Target(), concurrency=1, shuffle=False, seed=0)
@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from cache_backend import MemoryCacheBackend
+from ragchain import Deadline, DeadlineExceeded, HybridRAGChain
+
+
+class _Reply:
+    def __init__(self, content):
+        self.content = content
+
+
+class _Doc:
+    def __init__(self, text):
+        self.page_content = text
+
+
+class _Stage:
+    """Sleeps ``delay`` seconds (or until ``release`` is set) and counts calls."""
+
+    def __init__(self, value, delay=0.0, release=None):
+        self.value = value
+        self.delay = delay
+        self.release = release
+        self.calls = 0
+
+    def invoke(self, _inputs):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        time.sleep(self.delay)
+        return self.value
+
+
+class _GraphChain(_Stage):
+    graph = object()
+
+
+def _chain(graph_result=None, graph_delay=0.0, release=None, max_workers=16):
+    graph_chain = _GraphChain(
+        graph_result if graph_result is not None else {"result": "graph answer", "intermediate_steps": []},
+        delay=graph_delay, release=release,
+    )
+    retriever = _Stage([_Doc("chunk")])
+    llm = _Stage(_Reply(" synthesized "))
+    return HybridRAGChain(graph_chain, retriever, llm, max_workers=max_workers), graph_chain, retriever, llm
+
+
+def test_unbounded_request_runs_every_stage():
+    chain, graph_chain, retriever, llm = _chain()
+    result = chain.invoke({"question": "q"})
+    assert result["answer"] == "synthesized"
+    assert result["degradations"] == []
+    assert (graph_chain.calls, retriever.calls, llm.calls) == (1, 1, 1)
+    assert set(result["timings"]) == {"graph_ms", "semantic_ms", "synthesis_ms"}
+
+
+def test_semantic_is_skipped_when_budget_cannot_cover_it_and_synthesis():
+    chain, _, retriever, llm = _chain()
+    chain.stage_estimates.update(semantic=1.0, synthesis=0.1)
+    result = chain.invoke({"question": "q", "budget_s": 0.5})
+    assert result["degradations"] == ["skipped_semantic"]
+    assert retriever.calls == 0
+    assert llm.calls == 1
+    assert result["answer"] == "synthesized"
+
+
+def test_synthesis_is_skipped_and_graph_answer_served():
+    chain, _, retriever, llm = _chain()
+    chain.stage_estimates.update(semantic=0.1, synthesis=1.0)
+    result = chain.invoke({"question": "q", "budget_s": 0.5})
+    assert result["degradations"] == ["skipped_semantic", "skipped_synthesis"]
+    assert (retriever.calls, llm.calls) == (0, 0)
+    assert result["answer"] == "graph answer"
+
+
+def test_deadline_exceeded_without_a_graph_result():
+    chain, _, _, llm = _chain(graph_result={"result": "", "intermediate_steps": []})
+    chain.stage_estimates.update(synthesis=1.0)
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        chain.invoke({"question": "q", "budget_s": 0.5})
+    assert excinfo.value.stage == "synthesis"
+    assert llm.calls == 0
+
+    slow, _, _, _ = _chain(graph_delay=0.3)
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        slow.invoke({"question": "q", "budget_s": 0.05})
+    assert excinfo.value.stage == "graph"
+
+
+def test_queued_stage_is_cancelled_on_timeout():
+    chain, graph_chain, _, _ = _chain(max_workers=1)
+    busy = threading.Event()
+    chain._executor.submit(busy.wait, 5)  # the only worker is taken
+    try:
+        with pytest.raises(DeadlineExceeded):
+            chain.invoke({"question": "q", "budget_s": 0.05})
+    finally:
+        busy.set()
+    assert chain.stats()["abandoned_stages"] == {"running": 0, "total": 0, "cancelled": 1}
+    chain._executor.shutdown(wait=True)
+    assert graph_chain.calls == 0
+
+
+def test_when_settled_waits_for_the_abandoned_stage():
+    release = threading.Event()
+    chain, _, _, _ = _chain(release=release)
+    deadline = Deadline(0.05)
+    with pytest.raises(DeadlineExceeded):
+        chain.invoke({"question": "q", "deadline": deadline})
+    assert chain.stats()["abandoned_stages"] == {"running": 1, "total": 1, "cancelled": 0}
+
+    settled = threading.Event()
+    deadline.when_settled(settled.set)
+    assert not settled.is_set()
+    release.set()
+    assert settled.wait(5)
+    chain._executor.shutdown(wait=True)
+    assert chain.stats()["abandoned_stages"]["running"] == 0
+
+
+def test_when_settled_without_abandoned_stages_fires_immediately():
+    settled = []
+    Deadline(1.0).when_settled(lambda: settled.append(True))
+    assert settled == [True]
+
+
+def test_run_chain_serves_stale_answer_when_deadline_runs_out(monkeypatch):
+    import main
+
+    chain, _, _, _ = _chain()
+    monkeypatch.setattr(main, "_graph_service", None)
+    monkeypatch.setattr(main, "_hybrid_chain", chain)
+    monkeypatch.setattr(main, "_cache", MemoryCacheBackend())
+    monkeypatch.setattr(main, "_stale", MemoryCacheBackend())
+
+    payload = main._run_chain("q", False)
+    assert payload["answer"] == "synthesized"
+    assert main._stale.get(main._stale_key("q", False)) == payload
+
+    chain.graph_chain.delay = 0.3
+    stale = main._run_chain("q", False, Deadline(0.05))
+    assert stale["stale"] is True
+    assert stale["degradations"] == ["stale_cache"]
+    assert stale["answer"] == "synthesized"
+
+    with pytest.raises(DeadlineExceeded):
+        main._run_chain("other", False, Deadline(0.05))
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from reingest import EpochWatcher, IngestionJob, IngestionRunner, JobAlreadyRunning
+
+
+def _finished(state):
+    job = IngestionJob("reload")
+    job.update(state=state)
+    return job
+
+
+def test_watcher_backs_off_exponentially_after_failed_reloads():
+    watcher = EpochWatcher(runner=None, current_epoch=lambda: 1, chain_epoch=lambda: 0, interval=1.0, max_backoff=5.0)
+    assert not watcher._backing_off()
+
+    watcher._job = _finished("failed")
+    assert watcher._backing_off()
+    assert watcher.failures == 1
+    assert 1.5 < watcher._retry_at - time.monotonic() <= 2.0
+
+    watcher._job = _finished("failed")
+    watcher._backing_off()
+    assert 3.5 < watcher._retry_at - time.monotonic() <= 4.0
+
+    watcher._job = _finished("failed")
+    watcher._backing_off()
+    assert 4.5 < watcher._retry_at - time.monotonic() <= 5.0  # capped at max_backoff
+
+    watcher._job = _finished("succeeded")
+    assert not watcher._backing_off()
+    assert watcher.failures == 0
+
+
+def test_watcher_waits_for_a_running_job():
+    watcher = EpochWatcher(runner=None, current_epoch=lambda: 1, chain_epoch=lambda: 0, interval=1.0)
+    job = IngestionJob("reload")
+    job.update(state="running")
+    watcher._job = job
+    assert not watcher._backing_off()
+    assert watcher._job is job
+
+
+def test_runner_runs_one_job_at_a_time():
+    release = threading.Event()
+
+    def build(job):
+        release.wait(5)
+        return ("service", "chain")
+
+    runner = IngestionRunner(build, lambda job, service, chain: 7)
+    job = runner.start("structured")
+    with pytest.raises(JobAlreadyRunning):
+        runner.start("reload")
+    with pytest.raises(ValueError):
+        IngestionRunner(build, lambda *args: 0).start("unknown")
+    release.set()
+    deadline = time.monotonic() + 5
+    while job.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.to_dict()["state"] == "succeeded"
+    assert job.epoch == 7
+    assert runner.latest() is job